@@ -0,0 +1,130 @@
+# Admission Control - Backpressure for generation requests
+# Bounded in-flight/queued work plus a per-client token bucket; overflow gets 429
+
+import math
+import os
+import threading
+import time
+
+from fastapi import HTTPException
+
+import metrics
+from jobs import JOB_WORKERS
+
+# Together these bound the generations accepted but not finished (batch items count singly)
+MAX_IN_FLIGHT = int(os.environ.get("MINEDEV_MAX_IN_FLIGHT", JOB_WORKERS))
+MAX_QUEUED = int(os.environ.get("MINEDEV_MAX_QUEUED", 4 * JOB_WORKERS))
+CLIENT_RATE = float(os.environ.get("MINEDEV_CLIENT_RATE", 0.5))    # tokens per second
+CLIENT_BURST = float(os.environ.get("MINEDEV_CLIENT_BURST", 5))    # bucket capacity
+
+# Used until the first generation has been measured
+DEFAULT_GENERATION_SECONDS = 30.0
+
+REJECTIONS = metrics.REGISTRY.register(metrics.Counter(
+    "minedev_admission_rejections_total",
+    "Requests rejected with 429 by admission control",
+    label_names=("reason",)
+))
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens/s refill up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self, cost: float = 1.0) -> float:
+        """
+        Try to spend `cost` tokens
+
+        Returns:
+            0 if admitted, otherwise seconds until enough tokens accrue
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        if self.rate <= 0:
+            return math.inf
+        return (cost - self.tokens) / self.rate
+
+class AdmissionController:
+    """Decides whether a new generation may be queued right now"""
+
+    def __init__(self, max_in_flight: int = MAX_IN_FLIGHT, max_queued: int = MAX_QUEUED,
+                 client_rate: float = CLIENT_RATE, client_burst: float = CLIENT_BURST):
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def admit(self, client_id: str, job_manager, cost: float = 1.0):
+        """
+        Admit a request or raise a 429 with Retry-After
+
+        Args:
+            client_id: Caller identity for the per-client bucket
+            job_manager: Source of live queue depth and in-flight counts
+            cost: Generations this request adds (a batch's item count); also
+                  the tokens it spends, capped at the bucket size
+        """
+        capacity = self.max_in_flight + self.max_queued
+        if cost > capacity:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Request of {cost:g} generations exceeds the server's capacity of {capacity}"
+            )
+
+        load = job_manager.load
+        if load + cost > capacity:
+            wait = self.estimated_wait(max(0, load - job_manager.workers), job_manager.workers)
+            self._reject(
+                "capacity", wait,
+                f"Server at capacity ({job_manager.in_flight} running, {job_manager.queue_depth} queued, {load} generations pending)"
+            )
+
+        with self._lock:
+            bucket = self._buckets.get(client_id)
+            if bucket is None:
+                bucket = self._buckets[client_id] = TokenBucket(self.client_rate, self.client_burst)
+                self._prune()
+            # A batch larger than the bucket takes all of it rather than never fitting
+            retry_after = bucket.take(min(cost, bucket.capacity))
+
+        if retry_after > 0:
+            self._reject("rate_limit", retry_after, "Too many requests from this client")
+
+    def estimated_wait(self, queued: int, workers: int) -> float:
+        """Seconds until a newly queued job would start, from measured throughput"""
+        per_job = metrics.GENERATION_LATENCY.mean(kind="single") or self._stage_estimate()
+        return per_job * (queued + 1) / max(1, workers)
+
+    def _stage_estimate(self) -> float:
+        # Before any full generation has finished, add up the stages measured so far
+        return metrics.pipeline_estimate() or DEFAULT_GENERATION_SECONDS
+
+    def _reject(self, reason, wait_seconds, message):
+        REJECTIONS.inc(reason=reason)
+        retry_after = max(1, math.ceil(wait_seconds)) if math.isfinite(wait_seconds) else 3600
+        raise HTTPException(
+            status_code=429,
+            detail={"message": message, "reason": reason, "estimated_wait_seconds": round(wait_seconds, 1)},
+            headers={"Retry-After": str(retry_after)}
+        )
+
+    def _prune(self):
+        """Forget clients whose buckets have been full (idle) for a while"""
+        if len(self._buckets) < 1024:
+            return
+        idle_after = self.client_burst / self.client_rate if self.client_rate > 0 else 3600
+        cutoff = time.monotonic() - idle_after
+        for client_id in [cid for cid, bucket in self._buckets.items() if bucket.updated < cutoff]:
+            del self._buckets[client_id]
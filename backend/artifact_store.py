@@ -0,0 +1,212 @@
+# Artifact Store - Disk-quota-aware garbage collection for outputs/
+# Indexed LRU/TTL eviction so long-running instances never fill their disks
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+ARTIFACT_ROOT = Path(os.environ.get("MINEDEV_ARTIFACT_ROOT", "outputs"))
+ARTIFACT_MAX_BYTES = int(os.environ.get("MINEDEV_ARTIFACT_MAX_BYTES", 5 * 1024 ** 3))
+ARTIFACT_TTL = float(os.environ.get("MINEDEV_ARTIFACT_TTL", 24 * 3600))          # seconds since last access
+ARTIFACT_SWEEP_INTERVAL = float(os.environ.get("MINEDEV_ARTIFACT_SWEEP_INTERVAL", 60))
+
+INDEX_NAME = ".artifact_index.json"
+
+class ArtifactStore:
+    """
+    Size- and age-bounded index of files under the outputs directory
+
+    Every file the server or the pipeline writes is registered here, so
+    eviction works from the index alone and never walks the tree. Directories
+    listed in `exclude` (the result cache) manage their own budget.
+    """
+
+    def __init__(self, root=ARTIFACT_ROOT, max_bytes: int = ARTIFACT_MAX_BYTES,
+                 ttl: float = ARTIFACT_TTL, exclude=("cache",)):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.exclude = tuple(exclude)
+        self.index_path = self.root / INDEX_NAME
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # relative path -> {'size', 'accessed'}, least recent first
+        self._bytes = 0
+        self._dirty = False
+
+        self.evictions = 0
+        self.evicted_bytes = 0
+
+        self._load_index()
+
+    def track(self, path):
+        """Register (or refresh) a file that was just written"""
+        relative = self._relative(path)
+        if relative is None:
+            return
+        try:
+            size = (self.root / relative).stat().st_size
+        except OSError:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(relative, None)
+            if previous is not None:
+                self._bytes -= previous['size']
+            self._entries[relative] = {'size': size, 'accessed': time.time()}
+            self._bytes += size
+            self._dirty = True
+
+    def touch(self, path):
+        """Mark a file as recently used (e.g. on download)"""
+        relative = self._relative(path)
+        with self._lock:
+            entry = self._entries.get(relative)
+            if entry is not None:
+                entry['accessed'] = time.time()
+                self._entries.move_to_end(relative)
+                self._dirty = True
+
+    def sweep(self) -> int:
+        """
+        Delete expired files, then least recently used ones until under quota
+
+        Returns:
+            Number of files evicted
+        """
+        now = time.time()
+        victims = {}
+
+        with self._lock:
+            # Entries are in access order, so expired ones are all at the front
+            for relative, entry in self._entries.items():
+                if now - entry['accessed'] <= self.ttl:
+                    break
+                victims[relative] = entry
+
+            remaining = self._bytes - sum(entry['size'] for entry in victims.values())
+            for relative, entry in self._entries.items():
+                if remaining <= self.max_bytes:
+                    break
+                if relative not in victims:
+                    victims[relative] = entry
+                    remaining -= entry['size']
+
+            for relative, entry in victims.items():
+                del self._entries[relative]
+                self._bytes -= entry['size']
+                self.evicted_bytes += entry['size']
+            self.evictions += len(victims)
+
+            if victims:
+                self._dirty = True
+            if self._dirty:
+                self._save_index()
+                self._dirty = False
+
+        # Unlink outside the lock; writers only ever add entries
+        for relative in victims:
+            self._remove(self.root / relative)
+
+        return len(victims)
+
+    async def run(self, interval: float = ARTIFACT_SWEEP_INTERVAL):
+        """Sweep forever in the background (cancel the task to stop)"""
+        while True:
+            try:
+                evicted = await asyncio.to_thread(self.sweep)
+                if evicted:
+                    print(f"✓ Artifact store evicted {evicted} files")
+            except Exception as e:
+                print(f"WARNING: Artifact sweep failed: {e}")
+            await asyncio.sleep(interval)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl,
+                'evictions': self.evictions,
+                'evicted_bytes': self.evicted_bytes
+            }
+
+    def _relative(self, path):
+        """Index key for a path, or None if it lives outside the managed tree"""
+        path = Path(path)
+        if not path.is_absolute():
+            path = Path.cwd() / path
+        try:
+            relative = path.resolve().relative_to(self.root.resolve())
+        except ValueError:
+            return None
+        if not relative.parts or relative.parts[0] in self.exclude or relative.name.startswith(INDEX_NAME):
+            return None
+        return relative.as_posix()
+
+    def _remove(self, path: Path):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"WARNING: Could not evict {path}: {e}")
+            return
+
+        # Drop directories the eviction left empty (e.g. outputs/jobs/<id>/)
+        parent = path.parent
+        root = self.root.resolve()
+        while parent.resolve() != root:
+            try:
+                parent.rmdir()
+            except OSError:
+                break
+            parent = parent.parent
+
+    def _load_index(self):
+        if self.index_path.exists():
+            try:
+                with open(self.index_path) as f:
+                    saved = json.load(f)
+            except (OSError, ValueError):
+                print("WARNING: Artifact index unreadable, rebuilding")
+                saved = None
+        else:
+            saved = None
+
+        if saved is None:
+            self._adopt_existing()
+            return
+
+        for relative, entry in sorted(saved.items(), key=lambda item: item[1]['accessed']):
+            if (self.root / relative).is_file():
+                self._entries[relative] = entry
+                self._bytes += entry['size']
+
+    def _adopt_existing(self):
+        """One-off scan when there is no index yet, so files from before it existed get collected too"""
+        if not self.root.exists():
+            return
+
+        found = []
+        for path in self.root.rglob("*"):
+            if path.is_file() and self._relative(path) is not None:
+                stat = path.stat()
+                found.append((stat.st_mtime, self._relative(path), stat.st_size))
+
+        for accessed, relative, size in sorted(found):
+            self._entries[relative] = {'size': size, 'accessed': accessed}
+            self._bytes += size
+        self._dirty = bool(found)
+
+    def _save_index(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix(".json.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(self._entries, f)
+        os.replace(tmp_path, self.index_path)
@@ -0,0 +1,132 @@
+# Request Coalescer - Concurrent single generations share one sampling call
+# Jobs of the same quality tier arriving within a short window sample together,
+# then every job finishes (cleanup, textures, export) as its own pool call
+
+import asyncio
+import importlib.util
+import os
+
+COALESCE_WINDOW = float(os.environ.get("MINEDEV_COALESCE_WINDOW_MS", 50)) / 1000.0
+COALESCE_MAX = int(os.environ.get("MINEDEV_COALESCE_MAX", 8))
+
+# Without Shap-E there is no sampling to share, so jobs skip the window.
+# Checked by spec so the server still never imports torch
+SHAP_E_AVAILABLE = importlib.util.find_spec("shap_e") is not None
+
+class RequestCoalescer:
+    """
+    Groups concurrent single-request builds so their prompts meet in one worker
+
+    The Shap-E latent batcher lives inside each pool process, so requests
+    only share a diffusion batch when they sample in the same worker call.
+    The first job of a tier opens a `window`-second group; jobs of that tier
+    arriving meanwhile (up to `max_batch`) join it. The group runs only the
+    shared stages together (sample_group), then each job's CPU-bound
+    post-processing is its own finish_item call, so it spreads over the pool
+    instead of queueing behind the rest of the group. A job left on its own
+    runs build_asset as before.
+    """
+
+    def __init__(self, run_with_progress, build_asset, sample_group, finish_item, observe=None,
+                 window: float = COALESCE_WINDOW, max_batch: int = COALESCE_MAX,
+                 enabled: bool = SHAP_E_AVAILABLE):
+        """
+        Args:
+            run_with_progress: executor.run_in_pool_with_progress
+            build_asset: Single-request worker entry point
+            sample_group: Grouped shared-stage entry point (items tagged with "item")
+            finish_item: Per-item entry point taking a sample_group item's 'state'
+            observe: Optional callable(telemetry) for each worker call's telemetry
+            window: Seconds a group stays open after its first job
+            max_batch: Largest group; a full group starts immediately
+            enabled: False runs every job straight through build_asset
+        """
+        self.run_with_progress = run_with_progress
+        self.build_asset = build_asset
+        self.sample_group = sample_group
+        self.finish_item = finish_item
+        self.observe = observe or (lambda telemetry: None)
+        self.window = window
+        self.max_batch = max(1, max_batch)
+        self.enabled = enabled and self.max_batch > 1
+
+        self._open = {}  # group key -> [(job, args, future)]
+        self._running = set()  # Group tasks, referenced until they finish
+
+    async def build(self, key, job, *args):
+        """
+        Build one request, possibly alongside others with the same key
+
+        Args:
+            key: Jobs only share a call when their keys match (the quality tier)
+            job: Job whose emit() receives this request's progress events
+            *args: build_asset arguments (prompt, asset_type, features, seed)
+
+        Returns:
+            build_asset()-style result dict (telemetry already observed)
+        """
+        if not self.enabled:
+            return await self._build_one(job, args)
+
+        future = asyncio.get_running_loop().create_future()
+        group = self._open.get(key)
+        if group is None:
+            group = self._open[key] = []
+            asyncio.get_running_loop().call_later(self.window, self._close, key, group)
+        group.append((job, args, future))
+
+        if len(group) >= self.max_batch:
+            self._close(key, group)
+        return await future
+
+    def _close(self, key, group):
+        if self._open.get(key) is not group:
+            return  # Already started (filled up before the window closed)
+        del self._open[key]
+        task = asyncio.ensure_future(self._run(group))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _build_one(self, job, args):
+        built = await self.run_with_progress(self.build_asset, job.emit, *args)
+        self.observe(built.pop('telemetry'))
+        return built
+
+    async def _finish(self, job, state):
+        built = await self.run_with_progress(self.finish_item, job.emit, state)
+        self.observe(built.pop('telemetry'))
+        return built
+
+    async def _run(self, group):
+        try:
+            if len(group) == 1:
+                job, args, future = group[0]
+                future.set_result(await self._build_one(job, args))
+                return
+
+            async def route(event):
+                # Hand each item's events to its own job, untagged
+                index = event.pop("item", None)
+                if index is not None:
+                    await group[index][0].emit(event)
+
+            sampled = await self.run_with_progress(
+                self.sample_group, route, [(i, *args) for i, (_, args, _) in enumerate(group)]
+            )
+            self.observe(sampled['telemetry'])
+        except Exception as e:
+            for _, _, future in group:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        async def finish(result):
+            job, _, future = group[result['item']]
+            try:
+                if 'error' in result:
+                    raise RuntimeError(result['error'])
+                future.set_result(await self._finish(job, result['state']))
+            except Exception as e:
+                future.set_exception(e)
+
+        await asyncio.gather(*(finish(result) for result in sampled['items']))
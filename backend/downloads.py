@@ -0,0 +1,131 @@
+# Downloads - Conditional and ranged delivery of generated assets
+# ETag/If-None-Match for cheap revalidation, HTTP Range for partial fetches
+
+import hashlib
+from pathlib import Path
+
+from fastapi import HTTPException
+from fastapi.responses import Response, StreamingResponse
+
+GLB_MEDIA_TYPE = "model/gltf-binary"
+CHUNK_SIZE = 256 * 1024
+
+def etag_for_bytes(data: bytes) -> str:
+    """Strong ETag from the content itself"""
+    return '"' + hashlib.sha256(data).hexdigest()[:32] + '"'
+
+def etag_for_file(path: Path) -> str:
+    """Cheap ETag from file size and modification time (no hashing)"""
+    stat = path.stat()
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+def parse_range(range_header: str, size: int):
+    """
+    Parse a single-range `bytes=` header
+
+    Returns:
+        (start, end) inclusive byte offsets, or None to send the full body
+    """
+    if not range_header or not range_header.startswith("bytes="):
+        return None
+
+    spec = range_header[len("bytes="):].strip()
+    if "," in spec:
+        # Multipart ranges are rare for assets; serve the whole file instead
+        return None
+
+    first, _, last = spec.partition("-")
+    try:
+        if first == "":
+            # Suffix range: last N bytes
+            length = int(last)
+            if length <= 0:
+                raise ValueError
+            start, end = max(0, size - length), size - 1
+        else:
+            start = int(first)
+            end = int(last) if last else size - 1
+            end = min(end, size - 1)
+    except ValueError:
+        return None
+
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+
+    return start, end
+
+def _base_headers(etag, filename):
+    return {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, max-age=0, must-revalidate",
+        "Content-Disposition": f'attachment; filename="{filename}"'
+    }
+
+def _not_modified(request, etag) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+def _requested_range(request, etag, size):
+    # If-Range: only honor the range when the client's copy is still current
+    if_range = request.headers.get("if-range")
+    if if_range and if_range.strip() != etag:
+        return None
+    return parse_range(request.headers.get("range"), size)
+
+def bytes_response(request, data: bytes, filename: str, etag: str = None,
+                   media_type: str = GLB_MEDIA_TYPE):
+    """Serve an in-memory buffer with ETag and Range support"""
+    etag = etag or etag_for_bytes(data)
+    headers = _base_headers(etag, filename)
+
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    byte_range = _requested_range(request, etag, len(data))
+    if byte_range is None:
+        return Response(content=data, media_type=media_type, headers=headers)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{len(data)}"
+    return Response(content=data[start:end + 1], status_code=206, media_type=media_type, headers=headers)
+
+def file_response(request, path: Path, filename: str = None, media_type: str = GLB_MEDIA_TYPE):
+    """Serve a file from disk with ETag and Range support, streamed in chunks"""
+    filename = filename or path.name
+    size = path.stat().st_size
+    etag = etag_for_file(path)
+    headers = _base_headers(etag, filename)
+
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    byte_range = _requested_range(request, etag, size)
+    status_code = 200
+    start, end = 0, size - 1
+    if byte_range is not None:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    headers["Content-Length"] = str(end - start + 1)
+
+    def read_range():
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    return StreamingResponse(read_range(), status_code=status_code, media_type=media_type, headers=headers)
@@ -0,0 +1,211 @@
+# Process Pool Executor - Keeps CPU-bound pipeline work off the event loop
+# Mesh building, export and analysis run in worker processes
+
+import asyncio
+import importlib
+import itertools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+POOL_WORKERS = int(os.environ.get("MINEDEV_POOL_WORKERS", os.cpu_count() or 1))
+# Seconds warm-up waits for the slowest worker (its initializer loads the models)
+WARM_UP_TIMEOUT = float(os.environ.get("MINEDEV_WARM_UP_TIMEOUT", 900))
+
+_pool = None
+_manager = None
+_router = None
+_router_lock = threading.Lock()
+
+def resolve(target):
+    """
+    Turn a "module:function" string into the function it names
+
+    Passing work by name means the server process never has to import the
+    pipeline (torch, trimesh, ...) itself; only the workers do.
+    """
+    if not isinstance(target, str):
+        return target
+    module_name, _, attr = target.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+def _call(target, args, kwargs):
+    return resolve(target)(*args, **kwargs)
+
+def _initialize(target):
+    resolve(target)()
+
+def start_pool(workers: int = POOL_WORKERS, initializer=None):
+    """
+    Create the shared worker pool (idempotent)
+
+    Args:
+        workers: Number of worker processes
+        initializer: Optional function or "module:function" run once in each worker
+    """
+    global _pool
+
+    if _pool is None:
+        # spawn: forking a process that already runs uvicorn threads is unsafe
+        _pool = ProcessPoolExecutor(
+            max_workers=max(1, workers),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_initialize if initializer is not None else None,
+            initargs=(initializer,) if initializer is not None else ()
+        )
+        print(f"✓ Process pool started with {max(1, workers)} workers")
+
+    return _pool
+
+async def warm_up_pool(target, workers: int = POOL_WORKERS, timeout: float = WARM_UP_TIMEOUT):
+    """
+    Start every worker process and wait until each has run its initializer
+
+    One task per worker is submitted, and `target(barrier, timeout)` must
+    wait on the shared barrier. A worker holding a task can't take another,
+    so the barrier only opens once every worker has picked one up (after
+    its initializer); a worker that never gets there breaks it after
+    `timeout` seconds instead of leaving the others waiting forever.
+
+    Returns:
+        List of results from `target`, one per worker
+    """
+    workers = max(1, workers)
+    barrier = await asyncio.to_thread(lambda: _sync_manager().Barrier(workers))
+    return await asyncio.gather(*(run_in_pool(target, barrier, timeout) for _ in range(workers)))
+
+def shutdown_pool():
+    global _pool, _manager, _router
+
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+    with _router_lock:
+        _router = None  # Its thread exits once the manager is gone
+    if _manager is not None:
+        _manager.shutdown()
+        _manager = None
+
+def _sync_manager():
+    """Manager process whose queues and barriers pool workers can share"""
+    global _manager
+
+    if _manager is None:
+        _manager = multiprocessing.get_context("spawn").Manager()
+
+    return _manager
+
+class ProgressChannel:
+    """Picklable progress_queue handed to a worker call; tags its events for the router"""
+
+    def __init__(self, queue, channel_id):
+        self.queue = queue
+        self.channel_id = channel_id
+
+    def put(self, event):
+        self.queue.put((self.channel_id, event))
+
+class ProgressRouter:
+    """
+    Delivers every worker call's progress events to the event loop
+
+    All calls share one manager queue, read by a single dedicated thread
+    that hands each event to its call's asyncio.Queue. In-flight jobs hold
+    no threads of their own, so they never starve asyncio.to_thread users.
+    """
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = _sync_manager().Queue()
+        self._channels = {}  # channel id -> asyncio.Queue of events
+        self._ids = itertools.count()
+        self._thread = threading.Thread(target=self._read, name="progress-router", daemon=True)
+        self._thread.start()
+
+    def open(self):
+        """A (ProgressChannel, asyncio.Queue) pair for one worker call"""
+        channel_id = next(self._ids)
+        events = self._channels[channel_id] = asyncio.Queue()
+        return ProgressChannel(self.queue, channel_id), events
+
+    def close(self, channel):
+        self._channels.pop(channel.channel_id, None)
+
+    def _read(self):
+        while True:
+            try:
+                channel_id, event = self.queue.get()
+            except Exception:
+                return  # Manager shut down
+            events = self._channels.get(channel_id)
+            if events is not None and not self.loop.is_closed():
+                self.loop.call_soon_threadsafe(events.put_nowait, event)
+
+def _router_for(loop) -> ProgressRouter:
+    global _router
+
+    with _router_lock:
+        if _router is None or _router.loop is not loop:
+            _router = ProgressRouter(loop)
+        return _router
+
+async def _progress_router() -> ProgressRouter:
+    loop = asyncio.get_running_loop()
+    router = _router
+    if router is None or router.loop is not loop:
+        # Starting the manager blocks, so keep it off the event loop
+        router = await asyncio.to_thread(_router_for, loop)
+    return router
+
+async def run_in_pool(fn, *args, **kwargs):
+    """
+    Run a picklable, module-level function in the worker pool
+
+    Args:
+        fn: Function, or "module:function" string resolved in the worker
+        *args, **kwargs: Arguments; must be picklable
+
+    Returns:
+        Whatever `fn` returns (must be picklable)
+    """
+    pool = start_pool()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool, partial(_call, fn, args, kwargs))
+
+async def run_in_pool_with_progress(fn, on_event, *args, **kwargs):
+    """
+    Run `fn` in the worker pool, forwarding its progress events
+
+    `fn` receives a `progress_queue` keyword argument and may put event dicts
+    on it; each one is awaited through `on_event` in the event loop.
+
+    Args:
+        fn: Function, or "module:function" string resolved in the worker
+        on_event: async callable(event) invoked for every progress event
+        *args, **kwargs: Arguments for `fn`; must be picklable
+
+    Returns:
+        Whatever `fn` returns
+    """
+    router = await _progress_router()
+    channel, events = router.open()
+
+    async def forward():
+        while True:
+            event = await events.get()
+            if event is None:
+                return
+            await on_event(event)
+
+    forwarder = asyncio.create_task(forward())
+    try:
+        return await run_in_pool(fn, *args, progress_queue=channel, **kwargs)
+    finally:
+        # Sentinel goes in after the worker's last event, so nothing is dropped;
+        # the put is a manager round-trip, so it runs off the event loop
+        await asyncio.to_thread(channel.put, None)
+        await forwarder
+        router.close(channel)
@@ -0,0 +1,429 @@
+# Generation Worker - CPU-bound asset building for the process pool
+# Runs outside the asyncio event loop; results come back as GLB bytes + stats
+
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import trimesh
+
+from pipeline.mesh_templates import build_templates, instantiate
+from pipeline.stage1_multiview import generate_multiview_images, load_model
+from pipeline.stage2_reconstruction import reconstruct_3d_mesh, reconstruct_3d_meshes
+from pipeline.stage3_cleanup import cleanup_mesh
+from pipeline.stage4_textures import generate_pbr_textures
+from pipeline.export import export_glb_bytes
+from pipeline.quality import get_tier, quality_name
+from pipeline.uv_atlas import is_closed
+from pipeline import artifacts, telemetry
+
+# (stage, overall progress at start, overall progress at end)
+PIPELINE_STAGES = [
+    ("multiview", 2, 25),
+    ("reconstruction", 25, 40),
+    ("cleanup", 40, 75),
+    ("textures", 75, 90),
+    ("export", 90, 99),
+]
+
+class StageReporter:
+    """Turns per-stage progress callbacks into overall progress events"""
+
+    def __init__(self, progress_queue=None, item=None):
+        self.progress_queue = progress_queue
+        self.item = item  # Batch item index, tagged onto every event
+        self.durations = {}
+        # Debug artifact capture is decided once per asset so its stages stay together
+        self.capture = artifacts.sample()
+        self.tag = uuid.uuid4().hex[:12]
+        self._ranges = {name: (start, end) for name, start, end in PIPELINE_STAGES}
+
+    @classmethod
+    def resume(cls, state, progress_queue=None):
+        """Reporter picking up an asset handed over by another worker call (see handoff())"""
+        reporter = cls(progress_queue)
+        reporter.capture = state['capture']
+        reporter.tag = state['tag']
+        reporter.durations = dict(state['durations'])
+        return reporter
+
+    def callback(self, stage):
+        """Progress callback(fraction, message) for one stage"""
+        start, end = self._ranges[stage]
+
+        def report(fraction, message):
+            self.emit({
+                "stage": stage,
+                "progress": int(start + (end - start) * min(max(fraction, 0.0), 1.0)),
+                "message": message
+            })
+
+        return report
+
+    def run(self, stage, fn, *args, **kwargs):
+        """Run one stage, timing it and passing it a progress callback"""
+        started = time.perf_counter()
+        with artifacts.capturing(self.capture, self.tag):
+            result = fn(*args, progress=self.callback(stage), **kwargs)
+        self.finish(stage, time.perf_counter() - started)
+        return result
+
+    def finish(self, stage, seconds):
+        """Record a stage's duration and emit its done event"""
+        self.durations[stage] = round(seconds, 4)
+        telemetry.record_timing(stage, seconds)
+        self.emit({
+            "stage": stage,
+            "progress": self._ranges[stage][1],
+            "message": f"✓ {stage} done in {self.durations[stage]:.2f}s",
+            "duration": self.durations[stage]
+        })
+
+    def emit(self, event):
+        if self.progress_queue is not None:
+            if self.item is not None:
+                event = {"item": self.item, **event}
+            self.progress_queue.put(event)
+
+def select_placeholder(prompt: str, asset_type: str):
+    """Pick the type-specific placeholder mesh and output filename"""
+    if asset_type == "doll" or "doll" in prompt.lower():
+        return create_doll_mesh(), "doll_generated.glb"
+    elif asset_type == "character" or any(word in prompt.lower() for word in ["robot", "warrior", "character"]):
+        return create_character_mesh(), "character_generated.glb"
+    elif "environment" in asset_type.lower() or any(word in prompt.lower() for word in ["castle", "wall", "building"]):
+        return create_environment_mesh(), "environment_generated.glb"
+    else:
+        return create_default_mesh(), "asset_generated.glb"
+
+def build_asset(prompt: str, asset_type: str, features: dict = None, seed: int = 0, progress_queue=None):
+    """
+    Run the full pipeline for a generation request
+
+    stage1_multiview → stage2_reconstruction → stage3_cleanup →
+    stage4_textures → export, each reporting its own progress.
+
+    Runs inside a pool worker process. Only plain bytes and dicts cross the
+    process boundary, never trimesh objects.
+
+    Args:
+        prompt: Text prompt
+        asset_type: Request type ("doll", "character", "environment", ...)
+        features: Request feature flags (pbr_textures, ...)
+        seed: Sampling seed; with the prompt it picks the cached latent
+        progress_queue: Optional queue receiving progress event dicts
+
+    Returns:
+        Dict with 'filename', 'glb' (bytes), 'stats', per-stage 'durations'
+        and the worker's drained 'telemetry'
+    """
+    leftover = start_telemetry()
+    entry = new_entry(prompt, asset_type, features, seed, StageReporter(progress_queue))
+
+    for step in PIPELINE_STEPS:
+        step(entry)
+
+    return {**finish_entry(entry), 'telemetry': finish_telemetry(leftover)}
+
+def build_batch(items, progress_queue=None):
+    """
+    Run the pipeline for a group of requests inside one worker
+
+    Models are loaded once for the whole group, and the group passes through
+    the shared stages (GROUP_STEPS) together so sampling and decoding stay
+    batched. Each item then runs the remaining stages to completion on its
+    own, and its views, meshes and textures are released as soon as it is
+    exported. A failing item is reported and dropped without stopping the rest.
+
+    Args:
+        items: List of (item index, prompt, asset_type, features, seed)
+        progress_queue: Optional queue receiving progress event dicts;
+                        every event carries its "item" index
+
+    Returns:
+        Dict with 'items' (build_asset() results with an 'item' key, or
+        {'item', 'error'}) and the worker's drained 'telemetry'
+    """
+    leftover = start_telemetry()
+    load_model()
+
+    entries = [
+        new_entry(prompt, asset_type, features, seed, StageReporter(progress_queue, item=index))
+        for index, prompt, asset_type, features, seed in items
+    ]
+
+    run_group_steps(entries)
+
+    results = []
+    for entry in entries:
+        for step in ITEM_STEPS:
+            if entry['error'] is None:
+                run_step(step, entry)
+
+        item = entry['reporter'].item
+        if entry['error'] is not None:
+            results.append({'item': item, 'error': entry['error']})
+        else:
+            results.append({'item': item, **finish_entry(entry)})
+        release_entry(entry)
+    return {'items': results, 'telemetry': finish_telemetry(leftover)}
+
+def sample_group(items, progress_queue=None):
+    """
+    First half of a coalesced group: only the shared stages, in one worker
+
+    The group's prompts share sampling batches and one decode pass; each
+    item is then handed back so its cleanup, textures and export run as
+    their own pool call (finish_item) instead of queueing behind the
+    other items on this worker.
+
+    Args:
+        items: List of (item index, prompt, asset_type, features, seed)
+        progress_queue: Optional queue receiving progress event dicts;
+                        every event carries its "item" index
+
+    Returns:
+        Dict with 'items' ({'item', 'state'} where state goes to
+        finish_item, or {'item', 'error'}) and the worker's drained 'telemetry'
+    """
+    leftover = start_telemetry()
+    load_model()
+
+    entries = [
+        new_entry(prompt, asset_type, features, seed, StageReporter(progress_queue, item=index))
+        for index, prompt, asset_type, features, seed in items
+    ]
+    run_group_steps(entries)
+
+    results = []
+    for entry in entries:
+        item = entry['reporter'].item
+        if entry['error'] is not None:
+            results.append({'item': item, 'error': entry['error']})
+        else:
+            results.append({'item': item, 'state': handoff(entry)})
+        release_entry(entry)
+    return {'items': results, 'telemetry': finish_telemetry(leftover)}
+
+def finish_item(state, progress_queue=None):
+    """
+    Second half of a coalesced item: cleanup, textures and export
+
+    Args:
+        state: One item's 'state' from sample_group()
+        progress_queue: Optional queue receiving progress event dicts
+
+    Returns:
+        build_asset()-style result dict
+    """
+    leftover = start_telemetry()
+    entry = new_entry(*state['request'], StageReporter.resume(state['reporter'], progress_queue))
+    entry['mesh'] = trimesh.Trimesh(vertices=state['vertices'], faces=state['faces'], process=False)
+
+    for step in ITEM_STEPS:
+        step(entry)
+
+    return {**finish_entry(entry), 'telemetry': finish_telemetry(leftover)}
+
+def run_group_steps(entries):
+    """Run GROUP_STEPS stage by stage across a group, batching where a step allows it"""
+    for step in GROUP_STEPS:
+        live = [entry for entry in entries if entry['error'] is None]
+        if step in BATCHED_STEPS and len(live) > 1:
+            try:
+                BATCHED_STEPS[step](live)
+            except Exception:
+                # Fall back to item by item so one bad item can't sink the group
+                for entry in live:
+                    run_step(step, entry)
+        elif step in CONCURRENT_STEPS and len(live) > 1:
+            # Run the items side by side so the latent batcher can group them
+            with ThreadPoolExecutor(max_workers=len(live)) as threads:
+                list(threads.map(lambda entry: run_step(step, entry), live))
+        else:
+            for entry in live:
+                run_step(step, entry)
+
+def handoff(entry):
+    """Picklable state of an item after GROUP_STEPS (plain arrays, no trimesh)"""
+    reporter = entry['reporter']
+    return {
+        'request': entry['request'],
+        'vertices': np.asarray(entry['mesh'].vertices),
+        'faces': np.asarray(entry['mesh'].faces),
+        'reporter': {'capture': reporter.capture, 'tag': reporter.tag, 'durations': dict(reporter.durations)}
+    }
+
+def start_telemetry():
+    """
+    Drain what a failed earlier run left behind
+
+    Its timings are dropped, but the files it wrote (including debug
+    artifacts finished after that run's drain) are kept so they still
+    reach the server's artifact store.
+    """
+    leftover = telemetry.drain()
+    return {'written': leftover['written'], 'bytes_written': leftover['bytes_written']}
+
+def finish_telemetry(leftover):
+    """This run's telemetry, once its queued debug artifacts are on disk"""
+    artifacts.flush()
+    drained = telemetry.drain()
+    drained['written'] = leftover['written'] + drained['written']
+    drained['bytes_written'] += leftover['bytes_written']
+    return drained
+
+def run_step(step, entry):
+    """Run one step for one batch item, recording a failure on the item"""
+    try:
+        step(entry)
+    except Exception as e:
+        entry['error'] = str(e)
+        entry['reporter'].emit({"stage": "error", "message": str(e)})
+
+def new_entry(prompt, asset_type, features, seed, reporter):
+    """Per-request pipeline state passed between the stage steps"""
+    # Used when Shap-E is unavailable so each type still gets its own shape
+    fallback_mesh, filename = select_placeholder(prompt, asset_type)
+
+    return {
+        'request': (prompt, asset_type, features, seed),
+        'prompt': prompt,
+        'features': features or {},
+        'seed': seed,
+        'quality': get_tier(quality_name(features)),
+        'filename': filename,
+        'fallback_mesh': fallback_mesh,
+        'reporter': reporter,
+        'views': None,
+        'mesh': None,
+        'textures': None,
+        'glb': None,
+        'error': None
+    }
+
+def finish_entry(entry):
+    mesh = entry['mesh']
+    stats = {
+        "vertices": len(mesh.vertices),
+        "faces": len(mesh.faces),
+        "watertight": is_closed(mesh),
+        "volume": float(mesh.volume) if mesh.volume else 0
+    }
+
+    return {
+        'filename': entry['filename'],
+        'glb': entry['glb'],
+        'stats': stats,
+        'durations': entry['reporter'].durations
+    }
+
+def release_entry(entry):
+    """Drop an item's intermediate buffers once its result has been taken"""
+    for key in ('views', 'mesh', 'textures', 'glb', 'fallback_mesh'):
+        entry[key] = None
+
+def multiview_step(entry):
+    entry['views'] = entry['reporter'].run(
+        "multiview", generate_multiview_images, entry['prompt'], seed=entry['seed'], quality=entry['quality']
+    )
+
+def reconstruction_step(entry):
+    entry['mesh'] = entry['reporter'].run(
+        "reconstruction", reconstruct_3d_mesh, entry['views'], fallback_mesh=entry['fallback_mesh']
+    )
+
+def reconstruction_batch_step(entries):
+    # Decode the whole group's latents in one parallel pass; progress and
+    # debug captures stay per item
+    started = time.perf_counter()
+    meshes = reconstruct_3d_meshes(
+        [entry['views'] for entry in entries],
+        fallback_meshes=[entry['fallback_mesh'] for entry in entries],
+        progress=[entry['reporter'].callback("reconstruction") for entry in entries],
+        captures=[(entry['reporter'].capture, entry['reporter'].tag) for entry in entries]
+    )
+    seconds = time.perf_counter() - started
+    for entry, mesh in zip(entries, meshes):
+        entry['mesh'] = mesh
+        entry['reporter'].finish("reconstruction", seconds)
+
+def cleanup_step(entry):
+    entry['mesh'] = entry['reporter'].run(
+        "cleanup", cleanup_mesh, entry['mesh'],
+        target_faces=entry['quality']['target_faces'],
+        watertight_resolution=entry['quality']['remesh_resolution']
+    )
+
+def textures_step(entry):
+    if entry['features'].get("pbr_textures", True):
+        entry['textures'] = entry['reporter'].run(
+            "textures", generate_pbr_textures, entry['mesh'], entry['prompt'],
+            resolution=entry['quality']['texture_resolution']
+        )
+
+def export_step(entry):
+    entry['glb'] = entry['reporter'].run("export", export_stage, entry['mesh'], entry['textures'])
+
+# build_batch runs GROUP_STEPS stage by stage across the group, then
+# ITEM_STEPS item by item so only one item's textures are alive at a time.
+# Coalesced requests split there instead: sample_group, then finish_item per item
+GROUP_STEPS = (multiview_step, reconstruction_step)
+ITEM_STEPS = (cleanup_step, textures_step, export_step)
+PIPELINE_STEPS = GROUP_STEPS + ITEM_STEPS
+
+# Steps build_batch runs concurrently across items (sampling batches via
+# pipeline.latent_batcher); the rest stay sequential to keep CPU use bounded
+CONCURRENT_STEPS = (multiview_step,)
+
+# Steps with a whole-group implementation, so a sampled batch stays batched
+BATCHED_STEPS = {reconstruction_step: reconstruction_batch_step}
+
+def export_stage(mesh, textures, progress):
+    progress(0.0, "Exporting GLB...")
+    return export_glb_bytes(mesh, textures)
+
+# Helper functions to create different mesh types
+# Geometry comes from prebuilt templates (pipeline/mesh_templates.py), so each
+# call is an array copy instead of rebuilding and concatenating primitives
+
+# Load Shap-E in every worker at startup instead of on the first request
+PRELOAD_MODELS = os.environ.get("MINEDEV_PRELOAD_MODELS", "1") == "1"
+
+def init_worker():
+    """Process pool initializer: templates (and models) before the first request"""
+    build_templates()
+    if PRELOAD_MODELS:
+        load_model()
+
+def warm_up(barrier=None, timeout=None):
+    """
+    Cheap task proving this worker finished init_worker()
+
+    Waiting on the barrier holds this worker until every other worker has
+    taken its own warm-up task, so no worker runs two of them.
+
+    Returns:
+        Dict with the worker 'pid' and its 'telemetry' (model load stats)
+    """
+    if barrier is not None:
+        barrier.wait(timeout)
+    return {'pid': os.getpid(), 'telemetry': telemetry.drain()}
+
+def create_doll_mesh():
+    """Create cute doll-like character"""
+    return instantiate('doll')
+
+def create_character_mesh():
+    """Create character/robot warrior"""
+    return instantiate('character')
+
+def create_environment_mesh():
+    """Create environment piece (wall/structure)"""
+    return instantiate('environment')
+
+def create_default_mesh():
+    """Create default asset mesh"""
+    return instantiate('default')
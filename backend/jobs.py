@@ -0,0 +1,174 @@
+# Job Queue - Background generation jobs with a bounded worker pool
+# Work outlives the HTTP stream that started it and concurrency stays fixed
+
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+
+JOB_WORKERS = int(os.environ.get("MINEDEV_JOB_WORKERS", os.cpu_count() or 1))
+JOB_HISTORY = int(os.environ.get("MINEDEV_JOB_HISTORY", 256))
+
+TERMINAL_STATUSES = ("complete", "error")
+
+class Job:
+    """A single generation job and its replayable event log"""
+
+    def __init__(self, request, runner=None, cost: int = 1):
+        self.id = uuid.uuid4().hex
+        self.request = request
+        self.runner = runner
+        self.cost = cost  # Generations this job stands for (a batch counts its items)
+        self.status = "queued"
+        self.events = []
+        self.result = None
+        self.artifact = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self._changed = asyncio.Condition()
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    async def emit(self, event: dict):
+        """Append a progress event and wake every listener"""
+        async with self._changed:
+            self.events.append(event)
+            self._changed.notify_all()
+
+    async def _set_status(self, status):
+        async with self._changed:
+            self.status = status
+            self._changed.notify_all()
+
+    async def stream(self, since: int = 0):
+        """
+        Yield events from index `since`, then follow until the job finishes
+
+        Late subscribers get the full history replayed first.
+        """
+        position = since
+        while True:
+            async with self._changed:
+                while position >= len(self.events) and not self.done:
+                    await self._changed.wait()
+                pending = self.events[position:]
+                finished = self.done
+
+            for event in pending:
+                yield event
+            position += len(pending)
+
+            if finished and position >= len(self.events):
+                return
+
+    def summary(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "prompt": getattr(self.request, "prompt", None),
+            "type": getattr(self.request, "type", "batch"),
+            "events": len(self.events),
+            "progress": self.events[-1].get("progress") if self.events else 0,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "result": self.result,
+            "error": self.error
+        }
+
+class JobManager:
+    """Fixed-size pool of asyncio workers draining a FIFO job queue"""
+
+    def __init__(self, runner, workers: int = JOB_WORKERS, history: int = JOB_HISTORY):
+        """
+        Args:
+            runner: async callable(job) that performs the work and emits events;
+                    its return value becomes job.result
+            workers: Number of jobs allowed to run at once
+            history: Finished jobs kept around for status/replay lookups
+        """
+        self.runner = runner
+        self.workers = max(1, workers)
+        self.history = history
+
+        self._jobs = OrderedDict()
+        self._queue = None
+        self._tasks = []
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._tasks = [
+            asyncio.create_task(self._worker(i)) for i in range(self.workers)
+        ]
+        print(f"✓ Job queue started with {self.workers} workers")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, request, runner=None, cost: int = 1) -> Job:
+        """
+        Queue a job
+
+        Args:
+            request: The request the runner will process
+            runner: Optional async callable(job) overriding the manager's runner
+            cost: Generations the job stands for, counted by `load`
+        """
+        job = Job(request, runner, cost)
+        self._jobs[job.id] = job
+        self._queue.put_nowait(job)
+        self._prune()
+        return job
+
+    def get(self, job_id: str):
+        return self._jobs.get(job_id)
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    @property
+    def in_flight(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.status == "running")
+
+    @property
+    def load(self) -> int:
+        """Generations queued or running, counting each batch item"""
+        return sum(job.cost for job in self._jobs.values() if not job.done)
+
+    async def _worker(self, worker_id):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job):
+        job.started = time.time()
+        await job._set_status("running")
+
+        try:
+            job.result = await (job.runner or self.runner)(job)
+            status = "complete"
+        except Exception as e:
+            job.error = str(e)
+            await job.emit({"stage": "error", "message": str(e)})
+            status = "error"
+
+        job.finished = time.time()
+        await job._set_status(status)
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond the history limit"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
@@ -0,0 +1,255 @@
+# Metrics - Prometheus text-format metrics for the generation server
+# Stage latency histograms, queue/in-flight gauges, cache and I/O counters
+
+import threading
+
+from pipeline.telemetry import peak_rss_bytes
+
+# Seconds; covers sub-millisecond template work up to multi-minute diffusion
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{_escape(value)}"' for key, value in sorted(labels.items()))
+    return "{" + pairs + "}"
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a label set"""
+
+    def __init__(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            series = self._series.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def mean(self, **labels):
+        """
+        Average observed value over every series matching the given labels
+        (labels left out match anything), or None if unobserved
+        """
+        wanted = [(i, str(labels[name])) for i, name in enumerate(self.label_names) if name in labels]
+        total, count = 0.0, 0
+        with self._lock:
+            for key, series in self._series.items():
+                if all(key[i] == value for i, value in wanted):
+                    total += series[-2]
+                    count += series[-1]
+        return total / count if count else None
+
+    def means(self) -> dict:
+        """Average observed value for every label set seen so far"""
+        with self._lock:
+            return {key: series[-2] / series[-1] for key, series in self._series.items() if series[-1]}
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                labels = dict(zip(self.label_names, key))
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': bound})} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {series[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(labels)} {series[-2]}")
+                lines.append(f"{self.name}_count{_format_labels(labels)} {series[-1]}")
+        return lines
+
+class Counter:
+    """Monotonic counter keyed by a label set, or read from a callback at scrape time"""
+
+    def __init__(self, name, help_text, label_names=(), callback=None):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.callback = callback
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        if self.callback is not None:
+            lines.append(f"{self.name} {self.callback()}")
+            return lines
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(dict(zip(self.label_names, key)))} {value}")
+        return lines
+
+class Gauge:
+    """Point-in-time value, either set directly or read from a callback at scrape time"""
+
+    def __init__(self, name, help_text, label_names=(), callback=None):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.callback = callback
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            self._values[key] = value
+
+    def set_max(self, value: float, **labels):
+        """Keep the highest value seen (for peaks)"""
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            self._values[key] = max(value, self._values.get(key, value))
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        if self.callback is not None:
+            lines.append(f"{self.name} {self.callback()}")
+            return lines
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(dict(zip(self.label_names, key)))} {value}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+# Top-level pipeline stages (generation.PIPELINE_STAGES); every other
+# STAGE_LATENCY label is a step timed inside one of these
+PIPELINE_STAGE_LABELS = ("multiview", "reconstruction", "cleanup", "textures", "export")
+
+STAGE_LATENCY = REGISTRY.register(Histogram(
+    "minedev_stage_duration_seconds",
+    "Time spent in each pipeline stage and step",
+    label_names=("stage",)
+))
+GENERATION_LATENCY = REGISTRY.register(Histogram(
+    "minedev_generation_duration_seconds",
+    "End-to-end generation time for uncached requests",
+    label_names=("kind", "quality")
+))
+GENERATIONS = REGISTRY.register(Counter(
+    "minedev_generations_total",
+    "Finished generations by outcome",
+    label_names=("outcome",)
+))
+BYTES_WRITTEN = REGISTRY.register(Counter(
+    "minedev_bytes_written_total",
+    "Bytes written to disk by the server and pipeline workers",
+    label_names=("source",)
+))
+PEAK_RSS = REGISTRY.register(Gauge(
+    "minedev_peak_rss_bytes",
+    "Peak resident set size",
+    label_names=("process",)
+))
+
+MODEL_LOAD_SECONDS = REGISTRY.register(Gauge(
+    "minedev_model_load_seconds",
+    "Time the last worker took to load each model",
+    label_names=("model",)
+))
+MODEL_RESIDENT_BYTES = REGISTRY.register(Gauge(
+    "minedev_model_resident_bytes",
+    "Parameter and buffer bytes per model; shared=true means memory-mapped, one copy per host",
+    label_names=("model", "shared", "quantized")
+))
+
+def pipeline_estimate():
+    """
+    Expected seconds for one generation from the mean of each top-level stage
+    (nested steps are left out so their time isn't counted twice)
+
+    Returns:
+        Seconds, or None before any stage has been measured
+    """
+    means = [STAGE_LATENCY.mean(stage=stage) for stage in PIPELINE_STAGE_LABELS]
+    measured = [mean for mean in means if mean is not None]
+    return sum(measured) if measured else None
+
+def observe_telemetry(telemetry: dict):
+    """Fold a worker's drained telemetry (pipeline.telemetry.drain) into the registry"""
+    if not telemetry:
+        return
+    for stage, seconds in telemetry.get('timings', []):
+        STAGE_LATENCY.observe(seconds, stage=stage)
+    if telemetry.get('bytes_written'):
+        BYTES_WRITTEN.inc(telemetry['bytes_written'], source="pipeline")
+    if telemetry.get('peak_rss_bytes'):
+        PEAK_RSS.set_max(telemetry['peak_rss_bytes'], process="worker")
+    for model, info in telemetry.get('models', {}).items():
+        MODEL_LOAD_SECONDS.set(info['load_seconds'], model=model)
+        MODEL_RESIDENT_BYTES.set(
+            info['resident_bytes'], model=model,
+            shared=str(info['shared']).lower(), quantized=str(info.get('quantized', False)).lower()
+        )
+
+def register_runtime_gauges(job_manager, result_cache, artifact_store=None):
+    """Gauges read live from the job queue, result cache and artifact store at scrape time"""
+    REGISTRY.register(Gauge(
+        "minedev_job_queue_depth", "Jobs waiting for a worker",
+        callback=lambda: job_manager.queue_depth
+    ))
+    REGISTRY.register(Gauge(
+        "minedev_jobs_in_flight", "Jobs currently running",
+        callback=lambda: job_manager.in_flight
+    ))
+    REGISTRY.register(Counter(
+        "minedev_cache_hits_total", "Result cache hits since start",
+        callback=lambda: result_cache.stats()['hits']
+    ))
+    REGISTRY.register(Counter(
+        "minedev_cache_misses_total", "Result cache misses since start",
+        callback=lambda: result_cache.stats()['misses']
+    ))
+    REGISTRY.register(Gauge(
+        "minedev_cache_hit_ratio", "Result cache hit rate since start",
+        callback=lambda: result_cache.stats()['hit_rate']
+    ))
+    REGISTRY.register(Gauge(
+        "minedev_cache_bytes", "Bytes held by the result cache",
+        callback=lambda: result_cache.stats()['bytes']
+    ))
+    if artifact_store is not None:
+        REGISTRY.register(Gauge(
+            "minedev_artifact_bytes", "Bytes held under outputs/ outside the result cache",
+            callback=lambda: artifact_store.stats()['bytes']
+        ))
+        REGISTRY.register(Counter(
+            "minedev_artifact_evictions_total", "Files removed by artifact store eviction",
+            callback=lambda: artifact_store.stats()['evictions']
+        ))
+
+def render() -> str:
+    """All metrics in Prometheus text exposition format"""
+    PEAK_RSS.set_max(peak_rss_bytes(), process="server")
+    return REGISTRY.render()
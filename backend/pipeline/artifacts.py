@@ -0,0 +1,172 @@
+# Debug Artifacts - Write-behind capture of intermediate stage outputs
+# Off by default; sampled or full capture writes compact npz in the background
+
+import json
+import os
+import queue
+import random
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+from pipeline.telemetry import record_write
+
+# "off", "all", or a sample rate between 0 and 1 (fraction of assets captured)
+DEBUG_ARTIFACTS = os.environ.get("MINEDEV_DEBUG_ARTIFACTS", "off")
+ARTIFACT_DIR = Path(os.environ.get("MINEDEV_DEBUG_ARTIFACT_DIR", "outputs/debug"))
+WRITE_QUEUE_SIZE = int(os.environ.get("MINEDEV_DEBUG_ARTIFACT_QUEUE", 64))
+
+_local = threading.local()
+
+def sample_rate(mode: str = None) -> float:
+    mode = (mode or DEBUG_ARTIFACTS).strip().lower()
+    if mode in ("", "off", "0", "false"):
+        return 0.0
+    if mode in ("all", "on", "1", "true"):
+        return 1.0
+    try:
+        return min(max(float(mode), 0.0), 1.0)
+    except ValueError:
+        print(f"WARNING: Unknown MINEDEV_DEBUG_ARTIFACTS value '{mode}', capture disabled")
+        return 0.0
+
+def sample() -> bool:
+    """Decide whether one asset gets its intermediates captured"""
+    rate = sample_rate()
+    return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+@contextmanager
+def capturing(enabled: bool, tag: str = "latest"):
+    """
+    Capture (or not) everything saved from this thread inside the block
+
+    Args:
+        enabled: Usually the result of sample(), decided once per asset
+        tag: Filename prefix grouping one asset's artifacts
+    """
+    previous = getattr(_local, 'capture', None)
+    _local.capture = (enabled, tag)
+    try:
+        yield
+    finally:
+        _local.capture = previous
+
+def current_capture():
+    """The (enabled, tag) capture of this thread, to hand to helper threads"""
+    capture = getattr(_local, 'capture', None)
+    if capture is None:
+        # Outside a capturing() block (scripts, helper threads): sample per call
+        return sample(), "latest"
+    return capture
+
+class BackgroundWriter:
+    """Single daemon thread draining a bounded queue of write jobs"""
+
+    def __init__(self, max_pending: int = WRITE_QUEUE_SIZE):
+        self._jobs = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._loop, name="artifact-writer", daemon=True)
+        self._thread.start()
+        self.dropped = 0
+
+    def submit(self, path: Path, write):
+        """Queue write(path); drops the artifact instead of ever blocking the pipeline"""
+        try:
+            self._jobs.put_nowait((path, write))
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """Block until everything queued so far is on disk"""
+        self._jobs.join()
+
+    def _loop(self):
+        while True:
+            path, write = self._jobs.get()
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_name(f".{path.name}.tmp")
+                with open(tmp_path, 'wb') as f:
+                    write(f)
+                os.replace(tmp_path, path)
+                record_write(path)
+            except Exception as e:
+                print(f"WARNING: Could not write debug artifact {path}: {e}")
+            finally:
+                self._jobs.task_done()
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_writer() -> BackgroundWriter:
+    global _writer
+
+    with _writer_lock:
+        if _writer is None:
+            _writer = BackgroundWriter()
+    return _writer
+
+def flush():
+    """Wait until every queued artifact is written (no-op if nothing was ever captured)"""
+    with _writer_lock:
+        writer = _writer
+    if writer is not None:
+        writer.flush()
+
+def _submit(capture, stage, name, suffix, write):
+    _, tag = capture
+    path = ARTIFACT_DIR / stage / f"{tag}_{name}{suffix}"
+    get_writer().submit(path, write)
+    return path
+
+def _submit_arrays(capture, stage, name, arrays):
+    # Copy now so later in-place edits can't leak into the queued write
+    arrays = {key: np.array(value) for key, value in arrays.items() if value is not None}
+    return _submit(capture, stage, name, ".npz", lambda f: np.savez(f, **arrays))
+
+def save_arrays(stage: str, name: str, **arrays):
+    """
+    Capture raw arrays as an uncompressed .npz
+
+    Returns:
+        Path the artifact will be written to, or None if not captured
+    """
+    capture = current_capture()
+    if not capture[0]:
+        return None
+    return _submit_arrays(capture, stage, name, arrays)
+
+def save_mesh(stage: str, name: str, mesh):
+    """Capture a trimesh as vertices/faces (and UVs when present)"""
+    capture = current_capture()
+    if not capture[0]:
+        return None
+    uv = getattr(mesh.visual, 'uv', None)
+    return _submit_arrays(capture, stage, name, {
+        'vertices': np.asarray(mesh.vertices, dtype=np.float32),
+        'faces': np.asarray(mesh.faces, dtype=np.int32),
+        'uv': None if uv is None else np.asarray(uv, dtype=np.float32)
+    })
+
+def save_images(stage: str, name: str, images: dict):
+    """Capture images (PIL or arrays) as raw uint8 buffers in one .npz"""
+    capture = current_capture()
+    if not capture[0]:
+        return None
+    return _submit_arrays(capture, stage, name, images)
+
+def save_json(stage: str, name: str, data):
+    """Capture structured data as compact JSON"""
+    capture = current_capture()
+    if not capture[0]:
+        return None
+    encoded = json.dumps(data, separators=(',', ':'), default=_json_default).encode('utf-8')
+    return _submit(capture, stage, name, ".json", lambda f: f.write(encoded))
+
+def _json_default(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
@@ -6,6 +6,8 @@ import json
 from pathlib import Path
 import numpy as np
 
+from pipeline.telemetry import record_dir
+
 def export_for_unity(mesh, textures=None, lods=None, collision=None, output_dir="outputs/unity"):
     """Export mesh with Unity-specific setup"""
     print("Exporting for Unity...")
@@ -74,6 +76,7 @@ def export_for_unity(mesh, textures=None, lods=None, collision=None, output_dir=
         json.dump(material_template, f, indent=2)
     print(f"  ✓ URP material: {material_file}")
     
+    record_dir(output_path)
     print(f"\n✓ Unity export complete: {output_path}")
     return output_path
 
@@ -130,6 +133,7 @@ def export_for_unreal(mesh, textures=None, lods=None, collision=None, output_dir
         json.dump(ue_metadata, f, indent=2)
     print(f"  ✓ Unreal metadata: {metadata_file}")
     
+    record_dir(output_path)
     print(f"\n✓ Unreal Engine export complete: {output_path}")
     return output_path
 
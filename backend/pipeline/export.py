@@ -1,18 +1,27 @@
 # Export Module - GLB/FBX/OBJ export
 # Simplified to use trimesh built-in exporters
 
+import json
+
 import trimesh
 import numpy as np
 from pathlib import Path
 from PIL import Image
 
+from pipeline.stage4_textures import CONSTANT_TOLERANCE, is_constant, to_image
+from pipeline.telemetry import record_write, timed
+from pipeline.texture_store import get_texture_store
+
+FLAT_NORMAL = np.array([128, 128, 255])
+
+@timed("export_glb")
 def export_glb(mesh, textures=None, skeleton=None, filename="output.glb"):
     """
     Export mesh to GLB format
     
     Args:
         mesh: trimesh.Trimesh
-        textures: Dict of PIL Images (optional)
+        textures: Dict of texture arrays (optional)
         skeleton: Skeleton data dict (optional)
         filename: Output filename
     
@@ -27,10 +36,74 @@ def export_glb(mesh, textures=None, skeleton=None, filename="output.glb"):
     
     # Trimesh handles GLB export automatically
     mesh.export(output_path)
+    record_write(output_path)
     
     print(f"Exported to: {output_path}")
     return output_path
 
+@timed("export_glb")
+def export_glb_bytes(mesh, textures=None, skeleton=None):
+    """
+    Export mesh to GLB in memory
+    
+    Returns:
+        GLB file contents as bytes
+    """
+    return with_material(mesh, textures).export(file_type="glb")
+
+def build_material(textures):
+    """
+    glTF PBR material for a texture dict
+    
+    Constant (1x1) maps become factors instead of images: base color and
+    ORM roughness/metallic map to their factors, a flat normal map is
+    dropped, and only an occlusion value below 1.0 keeps a 1x1 texture.
+    """
+    from trimesh.visual.material import PBRMaterial
+    
+    material = {'name': 'Material_PBR'}
+    
+    albedo = textures.get('albedo')
+    if albedo is not None:
+        if is_constant(albedo):
+            material['baseColorFactor'] = [*albedo.reshape(-1)[:3].tolist(), 255]
+        else:
+            material['baseColorTexture'] = to_image(albedo)
+    
+    normal = textures.get('normal')
+    if normal is not None:
+        flat = is_constant(normal) and np.all(np.abs(normal.reshape(-1)[:3].astype(int) - FLAT_NORMAL) <= CONSTANT_TOLERANCE)
+        if not flat:
+            material['normalTexture'] = to_image(normal)
+    
+    orm = textures.get('orm')
+    if orm is not None:
+        if is_constant(orm):
+            occlusion, roughness, metallic = orm.reshape(-1)[:3].tolist()
+            material['roughnessFactor'] = roughness / 255
+            material['metallicFactor'] = metallic / 255
+            if occlusion < 255 - CONSTANT_TOLERANCE:
+                material['occlusionTexture'] = to_image(orm)
+        else:
+            # glTF reads occlusion from R and roughness/metallic from G/B: one image serves both
+            image = to_image(orm)
+            material['metallicRoughnessTexture'] = image
+            material['occlusionTexture'] = image
+            material['roughnessFactor'] = 1.0
+            material['metallicFactor'] = 1.0
+    
+    return PBRMaterial(**material)
+
+def with_material(mesh, textures):
+    """Copy of the mesh carrying the textures as a PBR material (needs UVs)"""
+    uv = getattr(mesh.visual, 'uv', None)
+    if not textures or uv is None:
+        return mesh
+    
+    textured = mesh.copy()
+    textured.visual = trimesh.visual.TextureVisuals(uv=uv, material=build_material(textures))
+    return textured
+
 def export_obj(mesh, textures=None, filename="output.obj"):
     """Export to OBJ format"""
     output_dir = Path("outputs")
@@ -39,12 +112,14 @@ def export_obj(mesh, textures=None, filename="output.obj"):
     
     mesh.export(output_path)
     
-    # Save textures if provided
+    # Textures go to the shared content-addressed store; the manifest points at them
     if textures:
-        texture_dir = output_dir / "textures"
-        texture_dir.mkdir(exist_ok=True)
-        for name, texture in textures.items():
-            texture.save(texture_dir / f"{name}.png")
+        store = get_texture_store()
+        manifest = {name: str(store.put(texture)) for name, texture in textures.items()}
+        manifest_path = output_path.with_suffix(".textures.json")
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        record_write(manifest_path)
     
     print(f"Exported to: {output_path}")
     return output_path
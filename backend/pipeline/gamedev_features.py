@@ -7,6 +7,8 @@ from pathlib import Path
 from typing import List, Dict
 import hashlib
 
+from pipeline.progressive_mesh import decimate, get_progressive
+
 def generate_batch_variations(base_mesh, prompt: str, count: int = 10, variation_type: str = "style"):
     """
     Generate multiple variations of a single asset
@@ -35,11 +37,10 @@ def generate_batch_variations(base_mesh, prompt: str, count: int = 10, variation
         elif variation_type == "detail":
             # Detail level variations
             target_faces = int(len(base_mesh.faces) * (0.5 + i / count))
-            mesh_var = base_mesh.copy()
-            if target_faces < len(mesh_var.faces):
-                mesh_var = mesh_var.simplify_quadric_decimation(target_faces)
+            if target_faces < len(base_mesh.faces):
+                mesh_var = decimate(base_mesh, target_faces)
             else:
-                mesh_var = mesh_var.subdivide()
+                mesh_var = base_mesh.subdivide()
                 
         elif variation_type == "rotation":
             # Rotation variations
@@ -78,6 +79,8 @@ def generate_lod_chain(mesh, levels: List[int] = [8000, 4000, 1000, 100]):
     """
     print(f"Generating LOD chain: {levels}")
     
+    # One collapse sequence serves every level
+    progressive = get_progressive(mesh)
     lods = {}
     
     for i, target_faces in enumerate(levels):
@@ -88,8 +91,7 @@ def generate_lod_chain(mesh, levels: List[int] = [8000, 4000, 1000, 100]):
             lod_mesh = mesh.copy()
         else:
             # Decimate to target
-            lod_mesh = mesh.copy()
-            lod_mesh = lod_mesh.simplify_quadric_decimation(target_faces)
+            lod_mesh = progressive.extract(target_faces)
         
         lods[lod_name] = {
             'mesh': lod_mesh,
@@ -136,12 +138,11 @@ def generate_collision_mesh(mesh, method: str = "convex_hull", max_triangles: in
         
     else:  # "simplified"
         # Simplified version of original mesh
-        collision = mesh.copy()
-        collision = collision.simplify_quadric_decimation(max_triangles)
+        collision = decimate(mesh, max_triangles)
     
     # Ensure collision mesh is simple enough
     if len(collision.faces) > max_triangles:
-        collision = collision.simplify_quadric_decimation(max_triangles)
+        collision = decimate(collision, max_triangles)
     
     print(f"  ✓ Collision mesh: {len(collision.faces)} faces (optimized for physics)")
     
@@ -239,7 +240,7 @@ def optimize_for_platform(mesh, platform: str = "pc", target_fps: int = 60):
     
     # Apply optimizations
     if len(optimized.faces) > max_faces:
-        optimized = optimized.simplify_quadric_decimation(max_faces)
+        optimized = decimate(mesh, max_faces)
     
     print(f"  ✓ Optimized to {len(optimized.faces):,} faces")
     print(f"  ✓ Target texture: {texture_res}px")
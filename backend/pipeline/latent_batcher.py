@@ -0,0 +1,85 @@
+# Latent Batcher - Micro-batching of Shap-E sampling across concurrent prompts
+# Prompts arriving within a short window share one batched sample_latents call
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+BATCH_MAX = int(os.environ.get("MINEDEV_LATENT_BATCH_MAX", 8))
+BATCH_WINDOW = float(os.environ.get("MINEDEV_LATENT_BATCH_WINDOW_MS", 25)) / 1000.0
+
+class LatentBatcher:
+    """
+    Background thread that groups sampling requests into batches
+
+    Callers block in sample() while the thread waits up to `window` seconds
+    after the first request for more to arrive (or until `max_batch` are
+    queued), then runs a single sample_latents call for the whole batch and
+    hands each caller its own latent. Only requests with identical sampling
+    parameters share a batch.
+    """
+
+    def __init__(self, sample_fn, max_batch: int = BATCH_MAX, window: float = BATCH_WINDOW):
+        """
+        Args:
+            sample_fn: callable(prompts, **params) returning a batched latent
+                       tensor with one row per prompt
+            max_batch: Largest batch handed to sample_fn
+            window: Seconds to wait for more prompts after the first arrives
+        """
+        self.sample_fn = sample_fn
+        self.max_batch = max(1, max_batch)
+        self.window = window
+
+        self._requests = queue.Queue()
+        self._pending = []  # Requests taken off the queue but not yet batched
+        self._thread = threading.Thread(target=self._loop, name="latent-batcher", daemon=True)
+        self._thread.start()
+
+    def sample(self, prompt: str, **params):
+        """
+        Sample one latent, batched with whatever else arrives meanwhile
+
+        Returns:
+            Latent tensor with a leading batch dimension of 1
+        """
+        future = Future()
+        self._requests.put((prompt, tuple(sorted(params.items())), future))
+        return future.result()
+
+    def _loop(self):
+        while True:
+            if not self._pending:
+                self._pending.append(self._requests.get())
+
+            # Collect until the window closes or the batch is full
+            deadline = time.monotonic() + self.window
+            while len(self._pending) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    self._pending.append(self._requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # Oldest request decides which parameter set runs now
+            params = self._pending[0][1]
+            batch = [request for request in self._pending if request[1] == params][:self.max_batch]
+            self._pending = [request for request in self._pending if request not in batch]
+
+            self._run(batch, dict(params))
+
+    def _run(self, batch, params):
+        prompts = [prompt for prompt, _, _ in batch]
+        try:
+            latents = self.sample_fn(prompts, **params)
+        except Exception as e:
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        for i, (_, _, future) in enumerate(batch):
+            future.set_result(latents[i:i + 1])
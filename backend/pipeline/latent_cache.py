@@ -0,0 +1,123 @@
+# Latent Cache - Persistent Shap-E latents keyed by prompt and sampling settings
+# Stored as fp16 .npy files that load memory-mapped, so reruns skip diffusion
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from pipeline.model_manager import host_lock
+from pipeline.telemetry import record_write
+
+LATENT_CACHE_DIR = Path(os.environ.get("MINEDEV_LATENT_CACHE_DIR", "outputs/cache/latents"))
+LATENT_CACHE_MAX_BYTES = int(os.environ.get("MINEDEV_LATENT_CACHE_MAX_BYTES", 1024 ** 3))
+
+def latent_key(prompt: str, guidance_scale: float, karras_steps: int,
+               sigma_min: float, sigma_max: float, seed: int, precision: str = "fp32") -> str:
+    """Content hash of everything that determines a sampled latent"""
+    payload = {
+        'prompt': prompt,
+        'guidance_scale': float(guidance_scale),
+        'karras_steps': int(karras_steps),
+        'sigma_min': float(sigma_min),
+        'sigma_max': float(sigma_max),
+        'seed': int(seed),
+        'precision': precision
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+class LatentCache:
+    """
+    Size-bounded LRU of fp16 latents on disk, shared by every worker process
+
+    The directory is the only record: file mtimes carry recency (get()
+    refreshes them) and eviction re-scans it under a host-wide lock, so the
+    bound holds for all workers together rather than for each one.
+    """
+
+    def __init__(self, root=LATENT_CACHE_DIR, max_bytes: int = LATENT_CACHE_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    def get(self, key: str):
+        """
+        Memory-mapped fp16 latent for a key
+
+        Returns:
+            Read-only numpy memmap, or None on a miss
+        """
+        path = self.root / f"{key}.npy"
+        try:
+            latent = np.load(path, mmap_mode='r')
+        except (FileNotFoundError, ValueError):
+            # Missing, or evicted by another worker between listing and loading
+            return None
+
+        try:
+            os.utime(path)  # Recency survives restarts and is visible to other workers
+        except OSError:
+            pass
+        return latent
+
+    def put(self, key: str, latent):
+        """
+        Store a latent (torch tensor or array) as fp16
+
+        Returns:
+            Path of the stored file
+        """
+        if hasattr(latent, 'detach'):
+            latent = latent.detach().cpu().numpy()
+        latent = np.ascontiguousarray(latent, dtype=np.float16)
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.root / f"{key}.npy"
+
+        # Write to a temp file first so readers never map a partial latent
+        tmp_path = self.root / f".{key}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, latent)
+        os.replace(tmp_path, path)
+        record_write(path)
+
+        with host_lock(self.root / "evict"):
+            self._evict()
+
+        return path
+
+    def _evict(self):
+        # Re-scan so files written or removed by other workers are counted
+        found = []
+        for path in self.root.glob("*.npy"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            found.append((stat.st_mtime, path.name, stat.st_size, path))
+
+        total = sum(size for _, _, size, _ in found)
+        # Least recently used first
+        for _, _, size, path in sorted(found):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_latent_cache() -> LatentCache:
+    """Process-wide latent cache"""
+    global _cache
+
+    with _cache_lock:
+        if _cache is None:
+            _cache = LatentCache()
+    return _cache
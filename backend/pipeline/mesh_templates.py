@@ -0,0 +1,147 @@
+# Mesh Templates - Prebuilt primitives and assemblies for placeholder meshes
+# Built once per process as flat arrays; requests only copy and transform
+
+import threading
+
+import numpy as np
+import trimesh
+
+# Primitive builders: name -> callable returning a trimesh.Trimesh
+PRIMITIVES = {
+    'icosphere_s2_r1.0': lambda: trimesh.creation.icosphere(subdivisions=2, radius=1.0),
+    'icosphere_s3_r0.4': lambda: trimesh.creation.icosphere(subdivisions=3, radius=0.4),
+    'capsule_h0.8_r0.25_s32': lambda: trimesh.creation.capsule(height=0.8, radius=0.25, count=[32, 32]),
+    'capsule_h0.5_r0.08_s16': lambda: trimesh.creation.capsule(height=0.5, radius=0.08, count=[16, 16]),
+    'capsule_h0.4_r0.1_s16': lambda: trimesh.creation.capsule(height=0.4, radius=0.1, count=[16, 16]),
+    'box_unit': lambda: trimesh.creation.box([1.0, 1.0, 1.0]),
+}
+
+def _translate(offset):
+    return trimesh.transformations.translation_matrix(offset)
+
+def _rotate_z_then_translate(angle, offset):
+    return _translate(offset) @ trimesh.transformations.rotation_matrix(angle, [0, 0, 1])
+
+def _box(extents, offset=(0, 0, 0)):
+    # Boxes share the unit template and are sized by a scale matrix
+    return ('box_unit', _translate(offset) @ np.diag([*extents, 1.0]))
+
+# Assemblies: name -> list of (primitive name, 4x4 transform)
+ASSEMBLIES = {
+    'doll': [
+        ('icosphere_s3_r0.4', _translate([0, 0.9, 0])),                          # Head
+        ('capsule_h0.8_r0.25_s32', _translate([0, 0.3, 0])),                     # Body
+        ('capsule_h0.5_r0.08_s16', _rotate_z_then_translate(np.pi / 4, [-0.3, 0.5, 0])),   # Left arm
+        ('capsule_h0.5_r0.08_s16', _rotate_z_then_translate(-np.pi / 4, [0.3, 0.5, 0])),   # Right arm
+        ('capsule_h0.4_r0.1_s16', _translate([-0.12, -0.2, 0])),                 # Left leg
+        ('capsule_h0.4_r0.1_s16', _translate([0.12, -0.2, 0])),                  # Right leg
+    ],
+    'character': [
+        _box([0.6, 0.8, 0.4], [0, 0.5, 0]),        # Torso
+        _box([0.4, 0.4, 0.4], [0, 1.2, 0]),        # Head
+        _box([0.15, 0.6, 0.15], [-0.4, 0.5, 0]),   # Left arm
+        _box([0.15, 0.6, 0.15], [0.4, 0.5, 0]),    # Right arm
+        _box([0.2, 0.8, 0.2], [-0.15, -0.3, 0]),   # Left leg
+        _box([0.2, 0.8, 0.2], [0.15, -0.3, 0]),    # Right leg
+    ],
+    'environment': [
+        _box([2.0, 2.0, 0.4]),                     # Wall
+        _box([0.3, 0.4, 0.3], [-0.7, 1.2, 0]),     # Crenellations
+        _box([0.3, 0.4, 0.3], [0, 1.2, 0]),
+        _box([0.3, 0.4, 0.3], [0.7, 1.2, 0]),
+    ],
+    'default': [
+        ('icosphere_s2_r1.0', np.eye(4)),
+    ],
+}
+
+_lock = threading.Lock()
+_primitives = {}   # name -> (vertices, faces)
+_assembled = {}    # name -> (vertices, faces)
+
+def build_templates():
+    """Build every primitive and assembly up front (call at worker startup)"""
+    for name in ASSEMBLIES:
+        get_assembly(name)
+    print(f"✓ Mesh templates ready: {len(_primitives)} primitives, {len(_assembled)} assemblies")
+
+def get_primitive(name):
+    """Flat (vertices, faces) arrays for a primitive, built on first use"""
+    arrays = _primitives.get(name)
+    if arrays is None:
+        with _lock:
+            arrays = _primitives.get(name)
+            if arrays is None:
+                mesh = PRIMITIVES[name]()
+                arrays = _freeze(mesh.vertices, mesh.faces)
+                _primitives[name] = arrays
+    return arrays
+
+def get_assembly(name):
+    """Flat (vertices, faces) arrays for a whole assembly, built on first use"""
+    arrays = _assembled.get(name)
+    if arrays is None:
+        vertices, faces = assemble(ASSEMBLIES[name])
+        with _lock:
+            arrays = _assembled.setdefault(name, _freeze(vertices, faces))
+    return arrays
+
+def assemble(parts):
+    """
+    Concatenate transformed primitives with preallocated array writes
+
+    Args:
+        parts: List of (primitive name, 4x4 transform)
+
+    Returns:
+        (vertices, faces) numpy arrays
+    """
+    primitives = [(get_primitive(name), transform) for name, transform in parts]
+
+    vertex_total = sum(len(v) for (v, _), _ in primitives)
+    face_total = sum(len(f) for (_, f), _ in primitives)
+
+    vertices = np.empty((vertex_total, 3), dtype=np.float64)
+    faces = np.empty((face_total, 3), dtype=np.int64)
+
+    v_offset = f_offset = 0
+    for (v, f), transform in primitives:
+        v_end = v_offset + len(v)
+        f_end = f_offset + len(f)
+
+        # Rotate/scale and translate straight into the output block
+        np.matmul(v, transform[:3, :3].T, out=vertices[v_offset:v_end])
+        vertices[v_offset:v_end] += transform[:3, 3]
+        np.add(f, v_offset, out=faces[f_offset:f_end])
+
+        v_offset, f_offset = v_end, f_end
+
+    return vertices, faces
+
+def instantiate(name, transform=None):
+    """
+    Fresh trimesh for an assembly: a copy of the cached arrays
+
+    Args:
+        name: Assembly name (see ASSEMBLIES)
+        transform: Optional 4x4 matrix applied to the copy
+
+    Returns:
+        trimesh.Trimesh
+    """
+    vertices, faces = get_assembly(name)
+
+    if transform is None:
+        vertices = vertices.copy()
+    else:
+        vertices = vertices @ transform[:3, :3].T + transform[:3, 3]
+
+    # Template arrays are already clean; skip trimesh's merge/validate pass
+    return trimesh.Trimesh(vertices=vertices, faces=faces.copy(), process=False)
+
+def _freeze(vertices, faces):
+    vertices = np.array(vertices, dtype=np.float64)
+    faces = np.array(faces, dtype=np.int64)
+    vertices.flags.writeable = False
+    faces.flags.writeable = False
+    return vertices, faces
@@ -0,0 +1,204 @@
+# Model Manager - Thread-safe, host-shared Shap-E model loading
+# Weights are memory-mapped from one file per model so every worker shares pages
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from pipeline.quantization import QUANTIZE, load_quantized, quantized_bytes
+from pipeline.telemetry import record_model, stage_timer
+
+MODEL_DIR = Path(os.environ.get("MINEDEV_MODEL_DIR", "outputs/cache/models"))
+SHARE_WEIGHTS = os.environ.get("MINEDEV_SHARE_WEIGHTS", "1") == "1"
+
+NETWORKS = ('transmitter', 'text300M')
+
+@contextmanager
+def host_lock(path: Path):
+    """Exclusive lock shared by every process on this host"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_suffix(".lock"), "w") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        else:
+            _lock_windows(lock_file)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            else:
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+def _lock_windows(lock_file):
+    # LK_LOCK gives up after about 10 seconds; an export can take longer, so keep waiting
+    while True:
+        try:
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            continue
+
+def tensor_bytes(module) -> int:
+    """Bytes held by a module's parameters and buffers"""
+    tensors = list(module.parameters()) + list(module.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+class ModelManager:
+    """
+    Loads the Shap-E models once per process, shared across the host
+
+    The first caller loads under a lock while concurrent callers wait, so
+    the weights are never loaded twice. On CPU each network's state dict is
+    exported once per host to MODEL_DIR and then memory-mapped, so N worker
+    processes share one copy of the weights in the page cache instead of
+    holding N private copies. With `quantize`, CPU networks get int8 linear
+    layers instead (private per process, but a quarter of the size).
+    """
+
+    def __init__(self, weights_dir=MODEL_DIR, share_weights: bool = SHARE_WEIGHTS, quantize: bool = QUANTIZE):
+        self.weights_dir = Path(weights_dir)
+        self.share_weights = share_weights
+        self.quantize = quantize
+
+        self._lock = threading.Lock()
+        self._loaded = False  # True after the first attempt, even if Shap-E is missing
+        self._models = None
+        self._stats = {}
+
+    def get(self):
+        """
+        The loaded model dict, loading it on first use
+
+        Returns:
+            Dict with 'xm', 'model', 'diffusion', 'device', 'sample_latents'
+            and 'decode_latent_mesh', or None when Shap-E is not installed
+        """
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._models = self._load()
+                    self._loaded = True
+        return self._models
+
+    def stats(self) -> dict:
+        """Per-network load time, resident bytes and whether weights are shared"""
+        return {name: dict(info) for name, info in self._stats.items()}
+
+    def _load(self):
+        print("Loading Shap-E text-to-3D model...")
+
+        try:
+            import torch
+            from shap_e.diffusion.sample import sample_latents
+            from shap_e.diffusion.gaussian_diffusion import diffusion_from_config
+            from shap_e.models.download import load_config
+            from shap_e.util.notebooks import decode_latent_mesh
+        except ImportError:
+            print("WARNING: Shap-E not installed. Using placeholder generation.")
+            return None
+
+        device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+
+        print(f"Loading models on {device}...")
+        with stage_timer('load_model'):
+            networks = {name: self._load_network(name, device) for name in NETWORKS}
+            diffusion = diffusion_from_config(load_config('diffusion'))
+
+        print(f"✓ Shap-E loaded successfully on {device}")
+        return {
+            'xm': networks['transmitter'],
+            'model': networks['text300M'],
+            'diffusion': diffusion,
+            'device': device,
+            'quantized': self.quantize and device.type == 'cpu',
+            'sample_latents': sample_latents,
+            'decode_latent_mesh': decode_latent_mesh
+        }
+
+    def _load_network(self, name, device):
+        started = time.perf_counter()
+
+        on_cpu = device.type == 'cpu'
+        shared = self.share_weights and on_cpu
+        quantized = self.quantize and on_cpu
+
+        def load_fp32():
+            return self._load_shared(name, device) if shared else self._load_private(name, device)
+
+        if quantized:
+            model = load_quantized(
+                name, self.weights_dir / f"{name}.int8.pt",
+                build_model=lambda: self._build(name, device),
+                load_fp32=load_fp32
+            )
+            shared = False
+        else:
+            model = load_fp32()
+        model.eval()
+
+        info = {
+            'load_seconds': round(time.perf_counter() - started, 3),
+            'resident_bytes': quantized_bytes(model) if quantized else tensor_bytes(model),
+            'shared': shared,
+            'quantized': quantized
+        }
+        self._stats[name] = info
+        record_model(name, **info)
+
+        storage = "int8" if quantized else "memory-mapped" if shared else "private"
+        print(f"  ✓ {name}: {info['resident_bytes'] / 1024 ** 2:.0f} MB ({storage}) in {info['load_seconds']:.1f}s")
+        return model
+
+    def _load_private(self, name, device):
+        from shap_e.models.download import load_model as load_shap_e_model
+
+        return load_shap_e_model(name, device=device)
+
+    def _build(self, name, device):
+        """The network's architecture with freshly initialized weights"""
+        from shap_e.models.configs import model_from_config
+        from shap_e.models.download import load_config
+
+        return model_from_config(load_config(name), device=device)
+
+    def _load_shared(self, name, device):
+        import torch
+
+        path = self.weights_dir / f"{name}.pt"
+
+        # One process per host exports the weights; the others wait and map them
+        with host_lock(path):
+            if not path.exists():
+                print(f"  Exporting {name} weights for sharing: {path}")
+                state = self._load_private(name, device).state_dict()
+                tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+                torch.save(state, tmp_path)
+                os.replace(tmp_path, path)
+                del state
+
+        model = self._build(name, device)
+        state = torch.load(path, map_location='cpu', mmap=True, weights_only=True)
+        # assign=True keeps the mapped tensors instead of copying into fresh ones
+        model.load_state_dict(state, assign=True)
+        return model
+
+_manager = None
+_manager_lock = threading.Lock()
+
+def get_model_manager() -> ModelManager:
+    """Process-wide model manager"""
+    global _manager
+
+    with _manager_lock:
+        if _manager is None:
+            _manager = ModelManager()
+    return _manager
@@ -1,15 +1,15 @@
 # Video to 3D Motion Transfer
 # Extract motion from video and apply to 3D models
 
-import cv2
-import mediapipe as mp
-import numpy as np
 from pathlib import Path
 
 class MotionTransfer:
     """Extract motion from video and transfer to 3D models"""
     
     def __init__(self):
+        # Deferred: mediapipe pulls in TensorFlow Lite and takes seconds to import
+        import mediapipe as mp
+        
         # Initialize MediaPipe Pose
         self.mp_pose = mp.solutions.pose
         self.mp_drawing = mp.solutions.drawing_utils
@@ -31,6 +31,8 @@ class MotionTransfer:
         Returns:
             List of pose landmarks per frame
         """
+        import cv2
+        
         cap = cv2.VideoCapture(video_path)
         motion_data = []
         frame_count = 0
@@ -0,0 +1,78 @@
+# Pipeline Parallelism - Shared process pool for splitting one asset's work
+# Used inside pipeline workers for independent pieces (UV charts, mesh parts)
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import util
+
+from pipeline import telemetry
+
+# The server already runs MINEDEV_POOL_WORKERS pipeline workers (one per core
+# by default), and each of them may fan out. A worker blocks while its pieces
+# run, so a fan-out of 2 adds only one busy process per worker; more than that
+# is only used when the server pool leaves cores spare (at most 4)
+SERVER_POOL_WORKERS = int(os.environ.get("MINEDEV_POOL_WORKERS", os.cpu_count() or 1))
+MIN_PIPELINE_PROCESSES = 2
+PIPELINE_PROCESSES = int(os.environ.get(
+    "MINEDEV_PIPELINE_PROCESSES",
+    max(MIN_PIPELINE_PROCESSES, min(4, (os.cpu_count() or 1) // max(1, SERVER_POOL_WORKERS)))
+))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Process-wide pool for CPU-bound pieces that hold the GIL (xatlas, voxelization)
+
+    Shut down when this process exits, so a pipeline worker's pool goes
+    away with the server's executor.
+    """
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=max(1, PIPELINE_PROCESSES),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            # Runs at interpreter exit, and also when this is itself a pool worker.
+            # The priority puts it ahead of the pool's own queue finalizers (10),
+            # which would otherwise close the pipe before the stop sentinels are sent
+            util.Finalize(None, shutdown_process_pool, exitpriority=100)
+    return _pool
+
+def shutdown_process_pool():
+    global _pool
+
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+def _run_with_telemetry(fn, args):
+    result = fn(*args)
+    return result, telemetry.drain()
+
+def run_parallel(fn, jobs):
+    """
+    Run fn(*job) for every job in the process pool
+
+    Timings and writes recorded in the pool processes are folded into this
+    process's telemetry, so they still reach the server.
+
+    Args:
+        fn: Picklable, module-level function
+        jobs: List of argument tuples
+
+    Yields:
+        (job index, result) as each job finishes
+    """
+    pool = get_process_pool()
+    futures = {pool.submit(_run_with_telemetry, fn, job): index for index, job in enumerate(jobs)}
+    for future in as_completed(futures):
+        result, drained = future.result()
+        telemetry.absorb(drained)
+        yield futures[future], result
@@ -0,0 +1,186 @@
+# Progressive Mesh - Quadric edge-collapse sequence recorded once per asset
+# Any face budget is then a linear-time replay instead of a fresh decimation
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import trimesh
+from scipy import sparse
+
+from pipeline.telemetry import stage_timer
+
+PROGRESSIVE_MIN_FACES = 32   # Collapse sequences are recorded down to this many faces
+PROGRESSIVE_CACHE_SIZE = 8   # Recent records kept per process, keyed by geometry
+
+def geometry_key(mesh) -> str:
+    """Hash of a mesh's vertices and faces"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.ascontiguousarray(mesh.vertices, dtype=np.float64).tobytes())
+    digest.update(np.ascontiguousarray(mesh.faces, dtype=np.int64).tobytes())
+    return digest.hexdigest()
+
+def vertex_quadrics(vertices, faces):
+    """Garland-Heckbert error quadric of every vertex, as (n, 16) rows"""
+    corners = vertices[faces]
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    lengths = np.linalg.norm(normals, axis=1)
+    valid = lengths > 0
+    normals = normals / np.where(valid, lengths, 1.0)[:, None]
+    planes = np.column_stack([normals, -np.einsum('ij,ij->i', normals, corners[:, 0])])
+    planes[~valid] = 0.0
+    face_quadrics = (planes[:, :, None] * planes[:, None, :]).reshape(-1, 16)
+
+    # Each vertex sums the quadrics of the faces around it
+    incidence = sparse.csr_matrix(
+        (np.ones(faces.size), (faces.ravel(), np.repeat(np.arange(len(faces)), 3))),
+        shape=(len(vertices), len(faces))
+    )
+    return np.asarray(incidence @ face_quadrics)
+
+class ProgressiveMesh:
+    """
+    A base mesh plus its ordered quadric edge-collapse sequence
+
+    Applying the first k collapses gives the same connectivity a decimation
+    would stop at after k steps, so one recorded decimation serves every
+    LOD, platform budget and collision target for the asset. Extraction is
+    plain numpy: collapses become a vertex -> survivor map, and each
+    survivor is placed at the minimum of its cluster's summed quadrics,
+    which is where the sequential decimation would have moved it.
+    """
+
+    def __init__(self, vertices, faces, collapses):
+        self.vertices = np.asarray(vertices, dtype=np.float64)
+        self.faces = np.asarray(faces, dtype=np.int64)
+        self.collapses = np.asarray(collapses, dtype=np.int32).reshape(-1, 2)
+        self._steps = {}  # face_count -> collapses replayed to reach it
+        self._quadrics = None
+
+    @classmethod
+    def build(cls, mesh, min_faces: int = PROGRESSIVE_MIN_FACES):
+        """Record the collapse sequence for a mesh down to about `min_faces`"""
+        from fast_simplification import simplify
+
+        vertices = np.asarray(mesh.vertices, dtype=np.float64)
+        faces = np.asarray(mesh.faces, dtype=np.int64)
+
+        if len(faces) <= min_faces:
+            return cls(vertices, faces, np.zeros((0, 2), dtype=np.int32))
+
+        with stage_timer('progressive_mesh'):
+            _, _, collapses = simplify(vertices, faces, target_count=min_faces, return_collapses=True)
+        return cls(vertices, faces, collapses)
+
+    @property
+    def face_count(self) -> int:
+        return len(self.faces)
+
+    def extract(self, face_count: int):
+        """
+        The mesh decimated to at most `face_count` faces
+
+        Returns:
+            New trimesh (the base mesh when the budget already fits); the
+            record's floor when asked for fewer faces than it holds
+        """
+        if face_count >= len(self.faces) or not len(self.collapses):
+            return trimesh.Trimesh(vertices=self.vertices.copy(), faces=self.faces.copy())
+
+        steps = self._steps.get(face_count)
+        if steps is not None:
+            return self._replay(steps)
+
+        # Fewest collapses that fit the budget. Each collapse removes about two
+        # faces, so start there and step by the remaining error within a bracket
+        low, high = 0, len(self.collapses)  # low is over budget; high fits (or is the floor)
+        best = None
+        steps = min((len(self.faces) - face_count) // 2, high)
+        for _ in range(8):
+            result = self._replay(steps)
+            excess = len(result.faces) - face_count
+            if excess > 0:
+                low = steps
+            else:
+                high, best = steps, result
+            if excess == 0 or high - low <= 1:
+                break
+            steps = min(max(steps + excess // 2, low + 1), high - 1)
+
+        if best is None:
+            best = self._replay(high)
+        self._steps[face_count] = high
+        return best
+
+    def _replay(self, steps: int):
+        n = len(self.vertices)
+        collapses = self.collapses[:steps]
+
+        # Vertex -> the vertex it finally collapsed into (pointer jumping)
+        survivor = np.arange(n)
+        survivor[collapses[:, 1]] = collapses[:, 0]
+        while True:
+            jumped = survivor[survivor]
+            if np.array_equal(jumped, survivor):
+                break
+            survivor = jumped
+
+        faces = survivor[self.faces]
+        faces = faces[(faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 0] != faces[:, 2])]
+
+        # Only clusters still referenced by a face become output vertices
+        roots = np.unique(faces)
+        cluster = np.searchsorted(roots, survivor)
+        member = roots[np.minimum(cluster, len(roots) - 1)] == survivor
+
+        if self._quadrics is None:
+            self._quadrics = vertex_quadrics(self.vertices, self.faces)
+        membership = sparse.csr_matrix(
+            (np.ones(member.sum()), (cluster[member], np.flatnonzero(member))),
+            shape=(len(roots), n)
+        )
+        quadrics = np.asarray(membership @ self._quadrics).reshape(-1, 4, 4)
+
+        # Minimize v'Qv, lightly pulled toward the survivor so flat clusters stay put
+        a = quadrics[:, :3, :3]
+        b = -quadrics[:, :3, 3]
+        anchor = self.vertices[roots]
+        weight = 1e-3 * np.trace(a, axis1=1, axis2=2)[:, None] / 3 + 1e-12
+        positions = np.linalg.solve(a + weight[:, :, None] * np.eye(3), (b + weight * anchor)[:, :, None])[:, :, 0]
+
+        return trimesh.Trimesh(vertices=positions, faces=np.searchsorted(roots, faces))
+
+    def save(self, path):
+        """Store the record (base mesh included) as an uncompressed .npz"""
+        np.savez(path, vertices=self.vertices, faces=self.faces, collapses=self.collapses)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        return cls(data['vertices'], data['faces'], data['collapses'])
+
+_records = OrderedDict()  # geometry key -> ProgressiveMesh, least recently used first
+_records_lock = threading.Lock()
+
+def get_progressive(mesh, min_faces: int = PROGRESSIVE_MIN_FACES) -> ProgressiveMesh:
+    """Progressive record for a mesh, built on first use and reused while the geometry is unchanged"""
+    key = geometry_key(mesh)
+
+    with _records_lock:
+        record = _records.get(key)
+        if record is not None:
+            _records.move_to_end(key)
+            return record
+
+    record = ProgressiveMesh.build(mesh, min_faces)
+
+    with _records_lock:
+        _records[key] = record
+        while len(_records) > PROGRESSIVE_CACHE_SIZE:
+            _records.popitem(last=False)
+    return record
+
+def decimate(mesh, face_count: int):
+    """Drop-in replacement for simplify_quadric_decimation(face_count=...) backed by the shared record"""
+    return get_progressive(mesh).extract(face_count)
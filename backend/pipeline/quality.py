@@ -0,0 +1,62 @@
+# Quality Tiers - Named speed/quality presets for CPU inference
+# Selected per request via features["quality"]: draft, standard or final
+
+import os
+
+# karras_steps / guidance_scale: Shap-E sampling
+# precision: "fp32" or "bf16" (CPU autocast); fp16 is only used on CUDA
+# threads: torch intra-op threads while sampling (None = torch default)
+# decode_grid: STF marching-cubes grid used when decoding the latent
+# remesh_resolution: voxels across the mesh for watertight remeshing in cleanup
+# target_faces / texture_resolution: cleanup and texturing budgets
+QUALITY_TIERS = {
+    'draft': {
+        'karras_steps': 16,
+        'guidance_scale': 15.0,
+        'precision': 'bf16',
+        # Previews are frequent; half the cores keeps two side by side cheap
+        'threads': max(1, (os.cpu_count() or 2) // 2),
+        'decode_grid': 64,
+        'remesh_resolution': 64,
+        'target_faces': 2000,
+        'texture_resolution': 512,
+    },
+    'standard': {
+        'karras_steps': 32,
+        'guidance_scale': 15.0,
+        'precision': 'fp32',
+        'threads': None,
+        'decode_grid': 128,
+        'remesh_resolution': 128,
+        'target_faces': 5000,
+        'texture_resolution': 1024,
+    },
+    'final': {
+        'karras_steps': 64,
+        'guidance_scale': 15.0,
+        'precision': 'fp32',
+        'threads': None,
+        'decode_grid': 128,
+        'remesh_resolution': 256,
+        'target_faces': 8000,
+        'texture_resolution': 2048,
+    },
+}
+
+DEFAULT_QUALITY = os.environ.get("MINEDEV_DEFAULT_QUALITY", "final")
+
+def quality_name(features: dict = None) -> str:
+    """Tier name requested by a feature dict, falling back to the default"""
+    return (features or {}).get("quality") or DEFAULT_QUALITY
+
+def get_tier(name: str = None) -> dict:
+    """
+    Settings for a quality tier
+
+    Raises:
+        ValueError: Unknown tier name
+    """
+    name = name or DEFAULT_QUALITY
+    if name not in QUALITY_TIERS:
+        raise ValueError(f"Unknown quality tier '{name}' (choose from {', '.join(QUALITY_TIERS)})")
+    return {'name': name, **QUALITY_TIERS[name]}
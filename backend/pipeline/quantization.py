@@ -0,0 +1,155 @@
+# Quantization - Int8 dynamic quantization of Shap-E linear layers for CPU inference
+# Quantized state dicts are cached on disk so startup never re-quantizes
+
+import os
+from pathlib import Path
+
+# "int8" enables quantized inference on CPU; anything else keeps fp32 weights
+QUANTIZE = os.environ.get("MINEDEV_QUANTIZE", "").lower() == "int8"
+
+def quantize_linear(model):
+    """Dynamic int8 quantization of every nn.Linear (weights int8, activations fp32)"""
+    import torch
+
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+def quantized_bytes(model) -> int:
+    """Bytes held by a dynamically quantized model, packed int8 weights included"""
+    import torch
+
+    total = 0
+    for module in model.modules():
+        if isinstance(module, torch.ao.nn.quantized.dynamic.Linear):
+            weight = module.weight()
+            total += weight.numel() * weight.element_size()
+            bias = module.bias()
+            if bias is not None:
+                total += bias.numel() * bias.element_size()
+        else:
+            for tensor in list(module.parameters(recurse=False)) + list(module.buffers(recurse=False)):
+                total += tensor.numel() * tensor.element_size()
+    return total
+
+def load_quantized(name, path: Path, build_model, load_fp32):
+    """
+    Quantized network, from the on-disk cache when present
+
+    Args:
+        name: Network name (for logging)
+        path: Where the quantized state dict is cached
+        build_model: callable() returning the network with untrained weights,
+                     used as the skeleton for a cached state dict
+        load_fp32: callable() returning the full-precision network
+
+    Returns:
+        The quantized network
+    """
+    import torch
+    from pipeline.model_manager import host_lock
+
+    with host_lock(path):
+        if not path.exists():
+            print(f"  Quantizing {name} to int8 (cached at {path})")
+            quantized = quantize_linear(load_fp32())
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            torch.save(quantized.state_dict(), tmp_path)
+            os.replace(tmp_path, path)
+            return quantized
+
+    quantized = quantize_linear(build_model())
+    # weights_only: the cache directory is writable, so never unpickle arbitrary objects from it
+    try:
+        state = torch.load(path, map_location='cpu', weights_only=True)
+    except Exception as e:
+        print(f"WARNING: Unreadable quantized cache for {name} ({e}), re-quantizing")
+        return quantize_linear(load_fp32())
+    quantized.load_state_dict(state)
+    return quantized
+
+def chamfer_distance(mesh_a, mesh_b, samples: int = 20000) -> float:
+    """Symmetric mean nearest-neighbour distance between two surfaces"""
+    from scipy.spatial import cKDTree
+
+    points_a = mesh_a.sample(samples)
+    points_b = mesh_b.sample(samples)
+    a_to_b, _ = cKDTree(points_b).query(points_a)
+    b_to_a, _ = cKDTree(points_a).query(points_b)
+    return float(a_to_b.mean() + b_to_a.mean()) / 2
+
+def benchmark(prompt: str = "a wooden chair", steps: int = 32, seed: int = 0, runs: int = 1):
+    """
+    Compare fp32 and int8 inference: sampling latency, latent drift, mesh Chamfer distance
+
+    Returns:
+        Dict of results
+    """
+    import time
+
+    import torch
+    import trimesh
+
+    from pipeline.model_manager import ModelManager
+
+    def run(quantize):
+        manager = ModelManager(quantize=quantize)
+        models = manager.get()
+        if models is None:
+            raise RuntimeError("Shap-E is not installed")
+
+        timings = []
+        for _ in range(runs):
+            torch.manual_seed(seed)
+            started = time.perf_counter()
+            latents = models['sample_latents'](
+                batch_size=1,
+                model=models['model'],
+                diffusion=models['diffusion'],
+                guidance_scale=15.0,
+                model_kwargs=dict(texts=[prompt]),
+                progress=False,
+                clip_denoised=True,
+                use_fp16=False,
+                use_karras=True,
+                karras_steps=steps,
+                sigma_min=1e-3,
+                sigma_max=160,
+                s_churn=0,
+            )
+            timings.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        decoded = models['decode_latent_mesh'](models['xm'], latents[0]).tri_mesh()
+        decode_seconds = time.perf_counter() - started
+
+        mesh = trimesh.Trimesh(vertices=decoded.verts, faces=decoded.faces, process=False)
+        return {
+            'sample_seconds': min(timings),
+            'decode_seconds': decode_seconds,
+            'resident_bytes': sum(info['resident_bytes'] for info in manager.stats().values()),
+            'latents': latents.float(),
+            'mesh': mesh
+        }
+
+    fp32 = run(False)
+    int8 = run(True)
+
+    drift = (int8['latents'] - fp32['latents']).norm() / fp32['latents'].norm()
+    return {
+        'fp32_sample_seconds': round(fp32['sample_seconds'], 2),
+        'int8_sample_seconds': round(int8['sample_seconds'], 2),
+        'speedup': round(fp32['sample_seconds'] / int8['sample_seconds'], 2),
+        'fp32_decode_seconds': round(fp32['decode_seconds'], 2),
+        'int8_decode_seconds': round(int8['decode_seconds'], 2),
+        'fp32_resident_mb': round(fp32['resident_bytes'] / 1024 ** 2),
+        'int8_resident_mb': round(int8['resident_bytes'] / 1024 ** 2),
+        'latent_relative_error': round(float(drift), 4),
+        'chamfer_distance': round(chamfer_distance(fp32['mesh'], int8['mesh']), 5),
+        'mesh_scale': round(float(fp32['mesh'].scale), 4)
+    }
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    prompt = sys.argv[1] if len(sys.argv) > 1 else "a wooden chair"
+    print(json.dumps(benchmark(prompt), indent=2))
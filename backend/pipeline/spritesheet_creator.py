@@ -1,10 +1,8 @@
 # Spritesheet Creator and Animator
 # Generate and animate spritesheets for 2D games
 
-import cv2
 import numpy as np
 from PIL import Image
-import imageio
 from pathlib import Path
 
 class SpritesheetCreator:
@@ -102,6 +100,8 @@ class SpritesheetCreator:
         Draw simple stick figure for animation
         (Placeholder - in production would be actual sprites or AI-generated)
         """
+        import cv2
+        
         h, w = frame.shape[:2]
         center_x, center_y = w // 2, h // 2
         
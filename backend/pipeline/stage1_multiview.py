@@ -1,89 +1,165 @@
 # Stage 1: REAL AI Multi-View/3D Generation using Shap-E
 # OpenAI's text-to-3D model
 
-import torch
+# torch and PIL are imported where used so importing this module stays cheap
+
+import threading
+from contextlib import nullcontext
+
 import numpy as np
-from PIL import Image
-from pathlib import Path
 
-_shap_e_model = None
+from pipeline.latent_batcher import LatentBatcher
+from pipeline.latent_cache import get_latent_cache, latent_key
+from pipeline.model_manager import get_model_manager
+from pipeline.quality import get_tier
+from pipeline.telemetry import stage_timer
+
+_batcher = None
+_batcher_lock = threading.Lock()
+_sampling_lock = threading.Lock()  # One sample_latents call at a time per process
+
+# Step count, guidance and precision come from the quality tier (pipeline/quality.py)
+SIGMA_MIN = 1e-3
+SIGMA_MAX = 160
 
 def load_model():
-    """Load Shap-E text-to-3D model"""
-    global _shap_e_model
+    """Load Shap-E text-to-3D model (once per process, weights shared per host)"""
+    return get_model_manager().get()
+
+def sample_latents_batch(prompts, guidance_scale, karras_steps, seed=0, precision="fp32", threads=None):
+    """
+    One sample_latents call for several prompts
+
+    Diffusion cost grows far less than linearly with batch size, so
+    concurrent prompts are much cheaper sampled together than one by one.
+    `seed` seeds the batch as a whole (Shap-E draws the noise for every row
+    at once), so a prompt's latent depends on its batch size and position;
+    repeats stay stable through the latent cache, not by resampling.
+    The seed is applied on a forked RNG, leaving the process-wide torch RNG
+    as it was.
+
+    Args:
+        precision: "fp32", or "bf16" for CPU autocast; on CUDA any reduced
+                   precision runs Shap-E's fp16 path
+        threads: torch intra-op threads for this call (None leaves them
+                 alone). torch's thread count is process-wide, so calls are
+                 serialized and the previous count is restored afterwards
+
+    Returns:
+        Latent tensor with one row per prompt
+    """
+    import torch
     
-    if _shap_e_model is None:
-        print("Loading Shap-E text-to-3D model...")
-        
+    model_dict = load_model()
+    on_cuda = model_dict['device'].type == 'cuda'
+    
+    # fp16 only pays off on GPU; CPU gets bf16 autocast or plain fp32
+    # (int8 quantized linears already run reduced precision and can't autocast)
+    use_fp16 = on_cuda and precision != "fp32"
+    if not on_cuda and precision == "bf16" and not model_dict['quantized']:
+        autocast = torch.autocast("cpu", dtype=torch.bfloat16)
+    else:
+        autocast = nullcontext()
+    
+    print(f"Sampling Shap-E latents for {len(prompts)} prompt(s): {karras_steps} steps, {precision}")
+    with _sampling_lock, torch.random.fork_rng(devices=[model_dict['device']] if on_cuda else []):
+        previous_threads = torch.get_num_threads()
+        if threads:
+            torch.set_num_threads(threads)
+        torch.manual_seed(seed)
         try:
-            from shap_e.diffusion.sample import sample_latents
-            from shap_e.diffusion.gaussian_diffusion import diffusion_from_config
-            from shap_e.models.download import load_model as load_shap_e_model, load_config
-            from shap_e.util.notebooks import decode_latent_mesh
-            
-            device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-            
-            print(f"Loading models on {device}...")
-            xm = load_shap_e_model('transmitter', device=device)
-            model = load_shap_e_model('text300M', device=device)
-            diffusion = diffusion_from_config(load_config('diffusion'))
-            
-            _shap_e_model = {
-                'xm': xm,
-                'model': model,
-                'diffusion': diffusion,
-                'device': device,
-                'sample_latents': sample_latents,
-                'decode_latent_mesh': decode_latent_mesh
-            }
-            
-            print(f"✓ Shap-E loaded successfully on {device}")
-            
-        except ImportError:
-            print("WARNING: Shap-E not installed. Using placeholder generation.")
-            _shap_e_model = None
-            return None
+            with stage_timer('sample_latents'), autocast:
+                latents = model_dict['sample_latents'](
+                    batch_size=len(prompts),
+                    model=model_dict['model'],
+                    diffusion=model_dict['diffusion'],
+                    guidance_scale=guidance_scale,
+                    model_kwargs=dict(texts=list(prompts)),
+                    progress=True,
+                    clip_denoised=True,
+                    use_fp16=use_fp16,
+                    use_karras=True,
+                    karras_steps=karras_steps,
+                    sigma_min=SIGMA_MIN,
+                    sigma_max=SIGMA_MAX,
+                    s_churn=0,
+                )
+        finally:
+            torch.set_num_threads(previous_threads)
     
-    return _shap_e_model
+    return latents.float()
+
+def get_batcher():
+    """
+    Per-process micro-batcher in front of sample_latents_batch
 
-def generate_multiview_images(prompt: str, num_views: int = 8):
+    Only prompts sampled in the same worker can share a batch: the items of
+    one build_batch or sample_group call (batch requests, and concurrent
+    single requests the server's RequestCoalescer groups together).
+    """
+    global _batcher
+    
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = LatentBatcher(sample_latents_batch)
+    return _batcher
+
+def generate_multiview_images(prompt: str, num_views: int = 8, seed: int = 0, quality: dict = None, progress=None):
     """
     Generate 3D model using Shap-E text-to-3D
     Returns mesh directly instead of multi-view images
+    
+    Latents are cached on disk by prompt, sampling settings and seed, so
+    re-running later stages for the same prompt skips diffusion entirely.
+    
+    Args:
+        prompt: Text description
+        num_views: Placeholder view count when Shap-E is unavailable
+        seed: Sampling seed
+        quality: Quality tier settings (pipeline.quality.get_tier); default tier if omitted
+        progress: Optional callback(fraction, message) for stage progress
     """
+    report = progress or (lambda fraction, message: None)
+    tier = quality or get_tier()
+    
+    report(0.0, "Loading Shap-E model...")
     model_dict = load_model()
     
     if model_dict is None:
         print("Using placeholder generation (Shap-E not available)")
+        report(0.5, "Shap-E not available, generating placeholder views...")
         return generate_placeholder_views(num_views)
     
     print(f"Generating 3D model with Shap-E from prompt: '{prompt}'")
     
     try:
-        device = model_dict['device']
+        import torch
         
-        # Set random seed for reproducibility
-        batch_size = 1
-        guidance_scale = 15.0
-        
-        # Generate latent representation
-        latents = model_dict['sample_latents'](
-            batch_size=batch_size,
-            model=model_dict['model'],
-            diffusion=model_dict['diffusion'],
-            guidance_scale=guidance_scale,
-            model_kwargs=dict(texts=[prompt] * batch_size),
-            progress=True,
-            clip_denoised=True,
-            use_fp16=True,
-            use_karras=True,
-            karras_steps=64,
-            sigma_min=1e-3,
-            sigma_max=160,
-            s_churn=0,
+        device = model_dict['device']
+        cache = get_latent_cache()
+        key = latent_key(
+            prompt, tier['guidance_scale'], tier['karras_steps'], SIGMA_MIN, SIGMA_MAX, seed, tier['precision']
         )
         
-        print("✓ 3D model generated from text")
+        cached = cache.get(key)
+        if cached is not None:
+            latents = torch.from_numpy(np.asarray(cached, dtype=np.float32)).to(device)
+            print("✓ Latent cache hit, skipping diffusion")
+            report(1.0, "Latents loaded from cache")
+        else:
+            report(0.1, f"Sampling Shap-E latents ({tier['name']})...")
+            # Generate latent representation, batched with concurrent prompts
+            latents = get_batcher().sample(
+                prompt,
+                guidance_scale=tier['guidance_scale'],
+                karras_steps=tier['karras_steps'],
+                seed=seed,
+                precision=tier['precision'],
+                threads=tier['threads']
+            )
+            cache.put(key, latents)
+            print("✓ 3D model generated from text")
+            report(1.0, "Latents sampled")
         
         # Store the latent for later mesh extraction
         # We'll return this as a special marker that stage2 will recognize
@@ -92,7 +168,8 @@ def generate_multiview_images(prompt: str, num_views: int = 8):
             'latent': latents,
             'xm': model_dict['xm'],
             'device': device,
-            'prompt': prompt
+            'prompt': prompt,
+            'decode_grid': tier['decode_grid']
         }
         
     except Exception as e:
@@ -102,6 +179,8 @@ def generate_multiview_images(prompt: str, num_views: int = 8):
 
 def generate_placeholder_views(num_views):
     """Fallback: Generate placeholder data"""
+    from PIL import Image
+    
     print(f"Generating {num_views} placeholder views...")
     
     # Create simple colored images as placeholders
@@ -1,61 +1,170 @@
 # Stage 2: Extract mesh from Shap-E latent or use TripoSR
 # Handles AI-generated 3D reconstruction
 
-import torch
-from PIL import Image
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import trimesh
 import numpy as np
-from pathlib import Path
 
-def reconstruct_3d_mesh(multiview_data):
+from pipeline import artifacts
+from pipeline.telemetry import stage_timer
+
+DECODE_WORKERS = int(os.environ.get("MINEDEV_DECODE_WORKERS", min(4, os.cpu_count() or 1)))
+
+_renderer_lock = threading.Lock()  # Guards xm.renderer.grid_size across concurrent decodes
+
+def reconstruct_3d_mesh(multiview_data, fallback_mesh=None, progress=None):
     """
     Reconstruct 3D mesh from AI generation
     
     Args:
         multiview_data: Either Shap-E latent dict or list of images
+        fallback_mesh: Optional mesh to use instead of the generic placeholder
+        progress: Optional callback(fraction, message) for stage progress
     
     Returns:
         trimesh.Trimesh object
     """
+    report = progress or (lambda fraction, message: None)
     
     # Check if we have Shap-E latent
     if isinstance(multiview_data, dict) and multiview_data.get('type') == 'shap_e_latent':
-        return extract_shap_e_mesh(multiview_data)
+        report(0.0, "Decoding Shap-E latent to mesh...")
+        mesh = extract_shap_e_mesh(multiview_data)
+    elif fallback_mesh is not None:
+        report(0.0, "Using type-specific placeholder mesh...")
+        mesh = fallback_mesh
     else:
         # Fallback to placeholder
-        return create_placeholder_mesh(high_quality=True)
+        report(0.0, "Creating placeholder mesh...")
+        mesh = create_placeholder_mesh(high_quality=True)
+    
+    report(1.0, f"Mesh ready: {len(mesh.vertices):,} vertices")
+    return mesh
+
+def reconstruct_3d_meshes(multiview_batch, fallback_meshes=None, progress=None, captures=None):
+    """
+    Batched reconstruct_3d_mesh: every Shap-E latent in the batch is decoded
+    in parallel, everything else falls back per item
+
+    Args:
+        multiview_batch: List of stage-1 results (latent dicts or image lists)
+        fallback_meshes: Optional per-item fallback meshes
+        progress: Optional per-item list of callback(fraction, message)
+        captures: Optional per-item debug capture (enabled, tag), so each
+                  item's artifacts are tagged as its own
+
+    Returns:
+        List of trimesh.Trimesh, one per item
+    """
+    count = len(multiview_batch)
+    reports = progress or [lambda fraction, message: None] * count
+    fallback_meshes = fallback_meshes or [None] * count
+    captures = captures or [artifacts.current_capture()] * count
+    meshes = [None] * count
+    
+    # Items of different quality tiers decode at different grid sizes
+    by_grid = {}
+    for i, data in enumerate(multiview_batch):
+        if isinstance(data, dict) and data.get('type') == 'shap_e_latent':
+            by_grid.setdefault(data.get('decode_grid'), []).append(i)
+    
+    for decode_grid, items in by_grid.items():
+        for i in items:
+            reports[i](0.0, f"Decoding {len(items)} Shap-E latents...")
+        decoded = extract_shap_e_meshes(
+            multiview_batch[items[0]]['xm'],
+            [multiview_batch[i]['latent'] for i in items],
+            decode_grid=decode_grid,
+            captures=[captures[i] for i in items]
+        )
+        for i, mesh in zip(items, decoded):
+            meshes[i] = mesh
+            reports[i](1.0, f"Mesh ready: {len(mesh.vertices):,} vertices")
+    
+    for i, data in enumerate(multiview_batch):
+        if meshes[i] is None:
+            with artifacts.capturing(*captures[i]):
+                meshes[i] = reconstruct_3d_mesh(data, fallback_mesh=fallback_meshes[i], progress=reports[i])
+    
+    return meshes
 
 def extract_shap_e_mesh(latent_data):
     """Extract mesh from Shap-E latent"""
-    print("Extracting mesh from Shap-E latent...")
-    
+    return extract_shap_e_meshes(
+        latent_data['xm'], [latent_data['latent']], decode_grid=latent_data.get('decode_grid')
+    )[0]
+
+def extract_shap_e_meshes(xm, latents, decode_grid=None, workers: int = DECODE_WORKERS, captures=None):
+    """
+    Decode Shap-E latents to meshes in parallel
+
+    torch runs the decoder with the GIL released, so a thread pool decodes
+    several latents at once without copying the model.
+
+    Args:
+        xm: Shap-E transmitter
+        latents: Batched latent tensor, or a list of tensors with a leading
+                 batch dimension; every row is decoded
+        decode_grid: Optional STF grid size (quality tier decode resolution)
+        workers: Decoder threads
+        captures: Optional debug capture (enabled, tag) per entry of `latents`;
+                  defaults to this thread's
+
+    Returns:
+        List of trimesh.Trimesh, one per latent row
+    """
+    batches = _as_batches(latents)
+    captures = captures or [artifacts.current_capture()] * len(batches)
+    # Thread-local capture, so each row carries its own into the decoder threads
+    rows = [(row, capture) for latent, capture in zip(batches, captures) for row in latent]
+    print(f"Extracting {len(rows)} mesh(es) from Shap-E latents...")
+
+    def decode(row):
+        latent, capture = row
+        with artifacts.capturing(*capture):
+            return _decode_one(xm, latent)
+
+    # Decode resolution follows the quality tier (STF renderer grid size). The
+    # renderer is shared by every decode in this process, so it is held at
+    # this call's size for the whole pass and restored afterwards
+    with _renderer_lock:
+        previous_grid = getattr(xm.renderer, 'grid_size', None)
+        if decode_grid and previous_grid is not None:
+            xm.renderer.grid_size = decode_grid
+        try:
+            if len(rows) == 1 or workers <= 1:
+                return [decode(row) for row in rows]
+            with ThreadPoolExecutor(max_workers=min(workers, len(rows))) as pool:
+                return list(pool.map(decode, rows))
+        finally:
+            if previous_grid is not None:
+                xm.renderer.grid_size = previous_grid
+
+def _as_batches(latents):
+    if hasattr(latents, 'dim'):
+        return [latents]
+    return list(latents)
+
+def _decode_one(xm, latent):
     try:
         from shap_e.util.notebooks import decode_latent_mesh
         
-        latent = latent_data['latent']
-        xm = latent_data['xm']
-        device = latent_data['device']
-        
-        # Decode latent to mesh
-        print("  Decoding latent to mesh...")
-        t = decode_latent_mesh(xm, latent[0]).tri_mesh()
+        with stage_timer('decode_latent_mesh'):
+            t = decode_latent_mesh(xm, latent).tri_mesh()
         
-        # Convert to trimesh
-        vertices = t.verts.cpu().numpy()
-        faces = t.faces.cpu().numpy()
+        # tri_mesh() already holds numpy arrays; torch tensors are viewed, not copied
+        vertices = _to_numpy(t.verts)
+        faces = _to_numpy(t.faces)
         
-        mesh = trimesh.Trimesh(
-            vertices=vertices,
-            faces=faces,
-            process=True
-        )
+        # cleanup_mesh re-merges and validates, so skip trimesh's processing here
+        mesh = trimesh.Trimesh(vertices=vertices, faces=faces, process=False)
         
         print(f"  ✓ Mesh extracted: {len(vertices):,} vertices, {len(faces):,} faces")
         
-        # Save
-        output_dir = Path("outputs/reconstruction")
-        output_dir.mkdir(parents=True, exist_ok=True)
-        mesh.export(output_dir / "ai_generated.obj")
+        artifacts.save_mesh("reconstruction", "ai_generated", mesh)
         
         return mesh
         
@@ -64,6 +173,12 @@ def extract_shap_e_mesh(latent_data):
         print("  Using high-quality placeholder instead")
         return create_placeholder_mesh(high_quality=True)
 
+def _to_numpy(array):
+    """Zero-copy view for CPU tensors (one device transfer for GPU tensors)"""
+    if hasattr(array, 'detach'):
+        return array.detach().cpu().numpy()
+    return np.asarray(array)
+
 def create_placeholder_mesh(high_quality=True):
     """Create high-quality placeholder for testing"""
     print("Creating placeholder mesh...")
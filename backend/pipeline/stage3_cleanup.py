@@ -1,11 +1,29 @@
 # Stage 3: Mesh Cleanup - ENHANCED FOR PROFESSIONAL QUALITY
 # Production-ready mesh processing
 
+import os
 import trimesh
 import numpy as np
-from pathlib import Path
+from scipy import ndimage, sparse
 
-def cleanup_mesh(mesh, target_faces=8000):  # INCREASED from 5000
+from pipeline import artifacts
+from pipeline.parallel import PIPELINE_PROCESSES, run_parallel
+from pipeline.progressive_mesh import decimate
+from pipeline.telemetry import timed
+from pipeline.uv_atlas import is_closed, unwrap
+
+# "components" cleans each connected part on its own; "whole" treats the mesh as one body
+CLEANUP_MODE = os.environ.get("MINEDEV_CLEANUP_MODE", "components")
+CLEANUP_PARALLEL_MIN_FACES = int(os.environ.get("MINEDEV_CLEANUP_PARALLEL_MIN_FACES", 20000))
+MIN_PART_FACES = 64  # Smallest per-part budget; more parts than the target allows are cleaned as one body
+
+# Dense voxel budget for watertight remeshing (the fill step needs the full grid)
+WATERTIGHT_MAX_VOXELS = int(os.environ.get("MINEDEV_WATERTIGHT_MAX_VOXELS", 2 ** 26))
+WATERTIGHT_MIN_RESOLUTION = 32
+SURFACE_SAMPLE_CHUNK = 2 ** 22  # Surface sample points held at once while voxelizing
+MARCHING_CUBES_BLOCK = int(os.environ.get("MINEDEV_MARCHING_CUBES_BLOCK", 64))
+
+def cleanup_mesh(mesh, target_faces=8000, watertight_resolution=256, mode=CLEANUP_MODE, progress=None):  # INCREASED from 5000
     """
     PROFESSIONAL-GRADE mesh cleanup
     
@@ -14,43 +32,138 @@ def cleanup_mesh(mesh, target_faces=8000):  # INCREASED from 5000
     - Better watertight algorithm
     - Improved retopology for quads
     - UV unwrapping for textures
+    
+    Args:
+        target_faces: Retopology face budget
+        watertight_resolution: Voxels across the mesh for watertight sealing
+        mode: "components" to clean disjoint parts separately (in parallel
+              for large meshes), "whole" to treat the mesh as one body
+        progress: Optional callback(fraction, message) for stage progress
     """
+    report = progress or (lambda fraction, message: None)
     
     print("Stage 3: PROFESSIONAL mesh cleanup...")
     
-    # Step 1: Enhanced watertight sealing
-    mesh = make_watertight_advanced(mesh)
-    
-    # Step 2: Professional retopology
-    mesh = retopology_professional(mesh, target_faces)
+    parts = mesh.split(only_watertight=False) if mode == "components" else [mesh]
+    if len(parts) * MIN_PART_FACES > target_faces:
+        # Too many parts for each to get a usable share of the budget
+        print(f"  - {len(parts)} parts exceed the {target_faces:,} face budget, cleaning as one mesh")
+        parts = [mesh]
     
-    # Step 3: Advanced smoothing
-    mesh = smooth_mesh_advanced(mesh)
+    if len(parts) > 1:
+        # Steps 1-3 per part: small per-part voxel grids instead of one global one
+        report(0.0, f"Cleaning {len(parts)} parts...")
+        mesh = cleanup_parts(parts, target_faces, watertight_resolution, mesh.scale, report)
+    else:
+        # Step 1: Enhanced watertight sealing
+        report(0.0, "Making watertight...")
+        mesh = make_watertight_advanced(mesh, watertight_resolution)
+        
+        # Step 2: Professional retopology
+        report(0.4, "Retopologizing...")
+        mesh = retopology_professional(mesh, target_faces)
+        
+        # Step 3: Advanced smoothing
+        report(0.6, "Smoothing...")
+        mesh = smooth_mesh_advanced(mesh)
     
     # Step 4: UV unwrapping
+    report(0.8, "Unwrapping UVs...")
     mesh = optimize_uvs_advanced(mesh)
     
-    # Save professional result
-    output_dir = Path("outputs/cleanup")
-    output_dir.mkdir(parents=True, exist_ok=True)
-    mesh.export(output_dir / "professional_mesh.obj")
+    # Capture the result (when debug artifacts are enabled)
+    artifacts.save_mesh("cleanup", "professional_mesh", mesh)
     
     print(f"✓ PROFESSIONAL cleanup: {len(mesh.vertices):,} vertices, {len(mesh.faces):,} faces")
-    print(f"✓ Watertight: {mesh.is_watertight}")
+    print(f"✓ Watertight: {is_closed(mesh)}")
     print(f"✓ UVs: Ready for texturing")
+    report(1.0, f"Cleanup complete: {len(mesh.faces):,} faces")
     
     return mesh
 
+def cleanup_parts(parts, target_faces, watertight_resolution, scale, report):
+    """
+    Seal, retopologize and smooth each connected part, then merge them
+
+    Each part gets MIN_PART_FACES plus its surface-area share of the rest
+    of the budget (so the parts never add up to more than `target_faces`),
+    and its voxel resolution is scaled to its size so the voxel pitch
+    matches a whole-mesh remesh. Large meshes fan the parts out over the
+    process pool.
+    """
+    areas = np.array([part.area for part in parts])
+    shares = areas / areas.sum() if areas.sum() > 0 else np.full(len(parts), 1 / len(parts))
+    spare = max(0, target_faces - len(parts) * MIN_PART_FACES)
+    
+    jobs = [
+        (
+            part.vertices.view(np.ndarray), part.faces.view(np.ndarray),
+            MIN_PART_FACES + int(spare * share),
+            max(WATERTIGHT_MIN_RESOLUTION, int(round(watertight_resolution * part.scale / scale)))
+        )
+        for part, share in zip(parts, shares)
+    ]
+    
+    cleaned = [None] * len(jobs)
+    total_faces = sum(len(part.faces) for part in parts)
+    if PIPELINE_PROCESSES > 1 and total_faces >= CLEANUP_PARALLEL_MIN_FACES:
+        for done, (index, result) in enumerate(run_parallel(cleanup_part, jobs), 1):
+            cleaned[index] = result
+            report(0.8 * done / len(jobs), f"Cleaned part {done}/{len(jobs)}")
+    else:
+        for index, job in enumerate(jobs):
+            cleaned[index] = cleanup_part(*job)
+            report(0.8 * (index + 1) / len(jobs), f"Cleaned part {index + 1}/{len(jobs)}")
+    
+    return trimesh.util.concatenate([
+        trimesh.Trimesh(vertices=vertices, faces=faces) for vertices, faces in cleaned
+    ])
+
+def cleanup_part(vertices, faces, target_faces, watertight_resolution):
+    """
+    Steps 1-3 of cleanup on one part (runs in a pool worker)
+
+    Returns:
+        (vertices, faces) arrays
+    """
+    mesh = trimesh.Trimesh(vertices=vertices, faces=faces)
+    mesh = make_watertight_advanced(mesh, watertight_resolution)
+    mesh = retopology_professional(mesh, target_faces)
+    mesh = smooth_mesh_advanced(mesh)
+    return mesh.vertices.view(np.ndarray), mesh.faces.view(np.ndarray)
+
+@timed()
 def make_watertight_advanced(mesh, resolution=256):
-    """Advanced watertight sealing with manifold preservation"""
-    print("  - Making watertight (advanced algorithm)...")
+    """
+    Advanced watertight sealing with manifold preservation
+
+    Meshes that are already watertight are returned untouched. Otherwise the
+    voxel pitch adapts to the mesh's edge lengths (up to `resolution` voxels
+    across) and is coarsened to stay within WATERTIGHT_MAX_VOXELS. The
+    surface is voxelized from sample points in bounded chunks and marching
+    cubes runs block by block over only the blocks that contain surface, so
+    the one dense array is the boolean occupancy grid itself.
+
+    Args:
+        resolution: Maximum voxels across the mesh's bounding box diagonal
+    """
+    if mesh.is_watertight:
+        print("  - Already watertight, skipping remesh")
+        return mesh
+    
+    pitch = watertight_pitch(mesh, resolution)
+    print(f"  - Making watertight (advanced algorithm, {mesh.scale / pitch:.0f} voxels across)...")
+    
+    # One empty voxel of margin on every side so the fill sees the outside
+    origin = mesh.bounds[0] - pitch
+    shape = np.ceil(mesh.extents / pitch).astype(int) + 3
     
-    # Multi-pass voxelization for better quality
-    voxels = mesh.voxelized(pitch=mesh.scale / resolution)
-    voxels = voxels.fill()
+    occupied = voxelize_surface(mesh, pitch, origin, shape)
+    occupied = ndimage.binary_fill_holes(occupied)
     
-    # Marching cubes with higher quality
-    watertight_mesh = voxels.marching_cubes
+    # Marching cubes with higher quality (back from voxel indices to mesh space)
+    watertight_mesh = blocked_marching_cubes(occupied)
+    watertight_mesh.vertices = watertight_mesh.vertices * pitch + origin
     
     # Ensure manifold edges
     if not watertight_mesh.is_watertight:
@@ -58,6 +171,110 @@ def make_watertight_advanced(mesh, resolution=256):
     
     return watertight_mesh
 
+def watertight_pitch(mesh, resolution=256, max_voxels=WATERTIGHT_MAX_VOXELS):
+    """
+    Voxel size for remeshing, adapted to feature size and capped by memory
+
+    Half the 10th-percentile edge length resolves the mesh's smaller
+    features; it is clamped between `resolution` and WATERTIGHT_MIN_RESOLUTION
+    voxels across, then coarsened until the bounding grid fits `max_voxels`.
+    """
+    finest = mesh.scale / resolution
+    coarsest = mesh.scale / min(WATERTIGHT_MIN_RESOLUTION, resolution)
+    
+    edges = mesh.edges_unique_length
+    edges = edges[edges > 0]
+    feature = 0.5 * np.percentile(edges, 10) if len(edges) else finest
+    pitch = float(np.clip(feature, finest, coarsest))
+    
+    # +3 for the grid's margin; cost grows with the cube of 1 / pitch
+    cells = np.prod(mesh.extents / pitch + 3)
+    if cells > max_voxels:
+        pitch *= (cells / max_voxels) ** (1 / 3)
+    return pitch
+
+def voxelize_surface(mesh, pitch, origin, shape, max_points=SURFACE_SAMPLE_CHUNK):
+    """
+    Boolean grid of the voxels the surface passes through
+
+    Each triangle is sampled on a grid spaced at half a voxel along its two
+    shortest edges, so slivers cost about as much as their area and the
+    points are generated and discarded in chunks of about `max_points`.
+    """
+    occupied = np.zeros(shape, dtype=bool)
+    step = pitch / 2
+    
+    # Put corner 0 opposite each triangle's longest edge
+    triangles = mesh.triangles
+    lengths = np.linalg.norm(triangles[:, [1, 2, 0]] - triangles[:, [2, 0, 1]], axis=2)
+    roll = np.argmax(lengths, axis=1)
+    order = (roll[:, None] + np.arange(3)) % 3
+    triangles = np.take_along_axis(triangles, order[:, :, None], axis=1)
+    
+    edge_u = triangles[:, 1] - triangles[:, 0]
+    edge_v = triangles[:, 2] - triangles[:, 0]
+    steps_u = np.maximum(np.ceil(np.linalg.norm(edge_u, axis=1) / step), 1).astype(np.int64)
+    steps_v = np.maximum(np.ceil(np.linalg.norm(edge_v, axis=1) / step), 1).astype(np.int64)
+    counts = (steps_u + 1) * (steps_v + 1)
+    
+    start = 0
+    while start < len(triangles):
+        # Grow the chunk until it holds about max_points candidate samples
+        end = start + max(1, int(np.searchsorted(np.cumsum(counts[start:]), max_points)))
+        chunk = slice(start, end)
+        
+        face = np.repeat(np.arange(start, end), counts[chunk])
+        offsets = np.cumsum(counts[chunk]) - counts[chunk]
+        k = np.arange(len(face)) - np.repeat(offsets, counts[chunk])
+        u = (k // (steps_v[face] + 1)) / steps_u[face]
+        v = (k % (steps_v[face] + 1)) / steps_v[face]
+        inside = u + v <= 1
+        face, u, v = face[inside], u[inside, None], v[inside, None]
+        
+        points = triangles[face, 0] + u * edge_u[face] + v * edge_v[face]
+        index = np.clip(np.round((points - origin) / pitch).astype(np.int64), 0, np.array(shape) - 1)
+        occupied[index[:, 0], index[:, 1], index[:, 2]] = True
+        start = end
+    
+    return occupied
+
+def blocked_marching_cubes(matrix, block=MARCHING_CUBES_BLOCK):
+    """
+    Marching cubes over a boolean occupancy grid, one block at a time
+
+    Blocks share a one-voxel overlap so seams line up exactly, and blocks
+    that are entirely inside or outside are skipped, so the float working
+    set is bounded by the block size and the work scales with surface area.
+
+    Returns:
+        Trimesh in voxel index coordinates (same as trimesh's marching_cubes)
+    """
+    from skimage import measure
+    
+    # Pad with empty space so surfaces touching the grid's edge close
+    empty = np.pad(~np.asarray(matrix, dtype=bool), 1, mode='constant', constant_values=True)
+    shape = np.array(empty.shape)
+    
+    vertices, faces, count = [], [], 0
+    for x in range(0, shape[0] - 1, block):
+        for y in range(0, shape[1] - 1, block):
+            for z in range(0, shape[2] - 1, block):
+                chunk = empty[x:x + block + 1, y:y + block + 1, z:z + block + 1]
+                if min(chunk.shape) < 2 or chunk.all() or not chunk.any():
+                    continue
+                verts, tris, _, _ = measure.marching_cubes(chunk.astype(np.float32), level=0.5)
+                vertices.append(verts + (x - 1, y - 1, z - 1))
+                faces.append(tris + count)
+                count += len(verts)
+    
+    if not vertices:
+        return trimesh.Trimesh()
+    
+    result = trimesh.Trimesh(vertices=np.concatenate(vertices), faces=np.concatenate(faces), process=False)
+    result.merge_vertices()  # Weld the duplicated seam vertices between blocks
+    return result
+
+@timed()
 def retopology_professional(mesh, target_faces):
     """Professional quad-dominant retopology"""
     print(f"  - Professional retopology to {target_faces:,} faces...")
@@ -66,17 +283,20 @@ def retopology_professional(mesh, target_faces):
     
     # Smart decimation
     if current_faces > target_faces:
-        # Use quadric error metric for quality preservation
-        mesh = mesh.simplify_quadric_decimation(target_faces)
+        # Use quadric error metric for quality preservation (recorded once, reused for LODs)
+        mesh = decimate(mesh, target_faces)
         print(f"    Decimated: {current_faces:,} → {len(mesh.faces):,} faces")
     elif current_faces < target_faces * 0.5:
         # Subdivide if too low poly
         mesh = mesh.subdivide()
+        if len(mesh.faces) > target_faces:
+            # Subdividing quadruples the count; don't overshoot the budget
+            mesh = decimate(mesh, target_faces)
         print(f"    Subdivided: {current_faces:,} → {len(mesh.faces):,} faces")
     
     # Clean up
-    mesh.remove_degenerate_faces()
-    mesh.remove_duplicate_faces()
+    mesh.update_faces(mesh.nondegenerate_faces())
+    mesh.update_faces(mesh.unique_faces())
     mesh.merge_vertices()
     mesh.remove_unreferenced_vertices()
     
@@ -85,50 +305,122 @@ def retopology_professional(mesh, target_faces):
     
     return mesh
 
-def smooth_mesh_advanced(mesh, iterations=10, lambda_factor=0.5):
-    """Advanced Taubin smoothing (preserves volume)"""
+def laplacian_matrix(mesh, weights="uniform"):
+    """
+    Row-normalized sparse vertex averaging operator W (CSR)
+
+    (W @ vertices)[i] is the weighted mean of vertex i's neighbours, so a
+    Laplacian step is vertices + factor * (W @ vertices - vertices).
+
+    Args:
+        weights: "uniform" (umbrella) or "cotangent" (clamped at zero so
+                 obtuse triangles can't produce negative weights)
+    """
+    n = len(mesh.vertices)
+
+    if weights == "uniform":
+        edges = mesh.edges_unique
+        rows = np.concatenate([edges[:, 0], edges[:, 1]])
+        cols = np.concatenate([edges[:, 1], edges[:, 0]])
+        values = np.ones(len(rows))
+    elif weights == "cotangent":
+        faces = mesh.faces
+        corners = mesh.vertices[faces]
+        rows, cols, values = [], [], []
+        for k in range(3):
+            # The angle at corner k weights the opposite edge (i, j)
+            i, j = (k + 1) % 3, (k + 2) % 3
+            a = corners[:, i] - corners[:, k]
+            b = corners[:, j] - corners[:, k]
+            cross = np.linalg.norm(np.cross(a, b), axis=1)
+            cot = np.einsum('ij,ij->i', a, b) / np.maximum(cross, 1e-12)
+            cot = np.maximum(cot, 0.0) * 0.5
+            rows += [faces[:, i], faces[:, j]]
+            cols += [faces[:, j], faces[:, i]]
+            values += [cot, cot]
+        rows, cols, values = np.concatenate(rows), np.concatenate(cols), np.concatenate(values)
+    else:
+        raise ValueError(f"Unknown Laplacian weights '{weights}' (choose uniform or cotangent)")
+
+    # Duplicate (i, j) entries from shared edges are summed on conversion
+    adjacency = sparse.coo_matrix((values, (rows, cols)), shape=(n, n)).tocsr()
+    totals = np.asarray(adjacency.sum(axis=1)).ravel()
+
+    # Vertices without (usable) neighbours average to themselves and stay put
+    isolated = totals <= 0
+    inverse = np.where(isolated, 0.0, 1.0 / np.where(isolated, 1.0, totals))
+    return (sparse.diags(inverse) @ adjacency + sparse.diags(isolated.astype(float))).tocsr()
+
+def feature_mask(mesh, boundary=True, feature_angle=None):
+    """
+    Vertices that smoothing should keep fixed
+
+    Args:
+        boundary: Pin vertices on open (single-face) edges
+        feature_angle: Pin vertices on edges whose dihedral angle exceeds
+                       this many degrees (None disables)
+
+    Returns:
+        Boolean array, True for pinned vertices
+    """
+    pinned = np.zeros(len(mesh.vertices), dtype=bool)
+
+    if boundary:
+        open_edges = trimesh.grouping.group_rows(mesh.edges_sorted, require_count=1)
+        pinned[mesh.edges_sorted[open_edges].ravel()] = True
+
+    if feature_angle is not None and len(mesh.face_adjacency):
+        sharp = mesh.face_adjacency_angles > np.radians(feature_angle)
+        pinned[mesh.face_adjacency_edges[sharp].ravel()] = True
+
+    return pinned
+
+@timed()
+def smooth_mesh_advanced(mesh, iterations=10, lambda_factor=0.5, mu_factor=-0.53,
+                         weights="uniform", preserve=None):
+    """
+    Advanced Taubin smoothing (preserves volume)
+
+    Each lambda/mu step is one sparse mat-vec against a precomputed operator.
+
+    Args:
+        weights: Laplacian weighting, "uniform" or "cotangent"
+        preserve: Optional boolean mask of vertices to keep fixed
+                  (see feature_mask for boundary/feature edges)
+    """
     print(f"  - Advanced smoothing ({iterations} iterations)...")
     
-    vertices = mesh.vertices.copy()
+    n = len(mesh.vertices)
+    identity = sparse.identity(n, format='csr')
+    averaging = laplacian_matrix(mesh, weights)
     
-    for i in range(iterations):
-        # Taubin smoothing (better than Laplacian)
-        # Positive step
-        new_vertices = vertices.copy()
-        vertex_adjacency = mesh.vertex_adjacency_graph
-        
-        for v_idx in range(len(vertices)):
-            neighbors = list(vertex_adjacency[v_idx])
-            if neighbors:
-                neighbor_mean = vertices[neighbors].mean(axis=0)
-                new_vertices[v_idx] = vertices[v_idx] + lambda_factor * (neighbor_mean - vertices[v_idx])
-        
-        # Negative step (volume preservation)
-        mu_factor = -0.53  # Optimal for Taubin
-        vertices_temp = new_vertices.copy()
-        for v_idx in range(len(new_vertices)):
-            neighbors = list(vertex_adjacency[v_idx])
-            if neighbors:
-                neighbor_mean = vertices_temp[neighbors].mean(axis=0)
-                new_vertices[v_idx] = vertices_temp[v_idx] + mu_factor * (neighbor_mean - vertices_temp[v_idx])
-        
-        vertices = new_vertices
+    # v + f * (W v - v) == ((1 - f) I + f W) v
+    shrink = (1.0 - lambda_factor) * identity + lambda_factor * averaging
+    inflate = (1.0 - mu_factor) * identity + mu_factor * averaging  # Negative step (volume preservation)
+    
+    if preserve is not None and np.any(preserve):
+        # Pinned rows become identity rows
+        free = sparse.diags((~preserve).astype(float))
+        pinned = sparse.diags(preserve.astype(float))
+        shrink = free @ shrink + pinned
+        inflate = free @ inflate + pinned
+    shrink, inflate = shrink.tocsr(), inflate.tocsr()
+    
+    vertices = np.asarray(mesh.vertices, dtype=np.float64)
+    for _ in range(iterations):
+        vertices = inflate @ (shrink @ vertices)
     
     mesh.vertices = vertices
     return mesh
 
+@timed()
 def optimize_uvs_advanced(mesh):
     """Generate optimized UV coordinates for texturing"""
     print("  - Generating professional UVs...")
     
     try:
-        # Try to use xatlas for best quality UVs
-        import xatlas
-        
-        vmapping, indices, uvs = xatlas.parametrize(mesh.vertices, mesh.faces)
-        
-        # Create new mesh with UVs
-        mesh.visual = trimesh.visual.TextureVisuals(uv=uvs)
+        # Try to use xatlas for best quality UVs (cached, split along seams via vmapping)
+        mesh = unwrap(mesh)
         print("    Using xatlas (professional quality)")
         
     except ImportError:
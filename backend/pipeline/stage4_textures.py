@@ -1,12 +1,26 @@
 # Stage 4: PBR Texture Generation
 # AI-powered texture synthesis with ORM packing
 
+import os
+
 import numpy as np
 from PIL import Image
 import trimesh
-from pathlib import Path
 
-def generate_pbr_textures(mesh, prompt, resolution=2048):
+from pipeline import artifacts
+from pipeline.telemetry import timed
+
+# Every map the engine can produce; ORM packs ao/roughness/metallic into RGB
+MAP_NAMES = ('albedo', 'normal', 'roughness', 'metallic', 'ao', 'orm')
+
+# What glTF/engine materials consume: base color, normal and packed ORM
+DEFAULT_MAPS = ('albedo', 'normal', 'orm')
+
+# Maps whose channels vary by at most this much (0-255) are stored as one pixel
+CONSTANT_TOLERANCE = int(os.environ.get("MINEDEV_TEXTURE_CONSTANT_TOLERANCE", 2))
+
+@timed()
+def generate_pbr_textures(mesh, prompt, resolution=2048, maps=DEFAULT_MAPS, compact=True, progress=None):
     """
     Generate PBR texture maps
     
@@ -14,96 +28,177 @@ def generate_pbr_textures(mesh, prompt, resolution=2048):
         mesh: trimesh.Trimesh object
         prompt: Text description for texture guidance
         resolution: Texture resolution (default 2048x2048)
+        maps: Names of the maps to produce (see MAP_NAMES); others are skipped
+        compact: Collapse constant maps to 1x1 (see compact_textures)
+        progress: Optional callback(fraction, message) for stage progress
     
     Returns:
-        Dictionary of texture PIL Images
+        Dictionary of uint8 numpy arrays, (H, W, 3) for color maps and
+        (H, W) for single channels; constant maps are (1, 1, 3) / (1, 1)
+        when compacted. See to_image for encoding
     """
+    report = progress or (lambda fraction, message: None)
+    
+    unknown = set(maps) - set(MAP_NAMES)
+    if unknown:
+        raise ValueError(f"Unknown texture maps: {', '.join(sorted(unknown))} (choose from {', '.join(MAP_NAMES)})")
+    
     print("Stage 4: Generating PBR textures...")
     
     # For now, generate procedural textures
     # TODO: Integrate AI texture generation (Stable Diffusion + ControlNet)
     
-    textures = {
-        'albedo': generate_albedo(mesh, resolution),
-        'normal': generate_normal(mesh, resolution),
-        'roughness': generate_roughness(mesh, resolution),
-        'metallic': generate_metallic(mesh, resolution),
-        'ao': generate_ao(mesh, resolution)
+    generators = {
+        'albedo': generate_albedo,
+        'normal': generate_normal,
+        'roughness': generate_roughness,
+        'metallic': generate_metallic,
+        'ao': generate_ao,
+        'orm': generate_orm
     }
     
-    # Critical: Pack ORM for iGPU performance
-    textures['orm'] = pack_orm_texture(
-        textures['ao'],
-        textures['roughness'],
-        textures['metallic']
-    )
+    textures = {}
+    for i, name in enumerate(maps):
+        report(i / len(maps), f"Generating {name} map...")
+        textures[name] = generators[name](mesh, resolution)
     
-    # Save textures
-    output_dir = Path("outputs/textures")
-    output_dir.mkdir(parents=True, exist_ok=True)
+    if compact:
+        textures = compact_textures(textures)
     
-    for name, texture in textures.items():
-        texture.save(output_dir / f"{name}.png")
+    # Raw buffers in the background instead of PNG-encoding on the critical path
+    artifacts.save_images("textures", "pbr", textures)
     
-    print(f"Generated {resolution}x{resolution} PBR textures")
+    print(f"Generated {resolution}x{resolution} PBR textures ({', '.join(maps)})")
+    report(1.0, f"Generated {resolution}x{resolution} PBR textures")
     
     return textures
 
-def generate_albedo(mesh, resolution):
+def constant_value(texture, tolerance=CONSTANT_TOLERANCE):
+    """
+    The value of a (near-)uniform texture
+    
+    Returns:
+        uint8 array with one value per channel, or None if the map varies
+    """
+    channels = [texture[:, :, c] for c in range(texture.shape[2])] if texture.ndim == 3 else [texture]
+    
+    # A strided sample rejects most varying maps without a full pass
+    for channel in channels:
+        sample = channel[::31, ::31]
+        if int(sample.max()) - int(sample.min()) > tolerance:
+            return None
+    
+    # Per-channel 2D reductions; reducing an (N, 3) view along axis 0 is far slower
+    value = []
+    for channel in channels:
+        low, high = int(channel.min()), int(channel.max())
+        if high - low > tolerance:
+            return None
+        value.append((low + high) // 2)
+    return np.array(value, dtype=np.uint8)
+
+def is_constant(texture) -> bool:
+    """True for a texture already collapsed to a single pixel"""
+    return texture.shape[0] == 1 and texture.shape[1] == 1
+
+def compact_textures(textures, tolerance=CONSTANT_TOLERANCE):
+    """
+    Replace uniform maps with 1x1 textures of their value
+    
+    Exporters turn these into material factors (or drop them when they
+    match the glTF default), so flat normal/roughness/metallic/AO maps
+    cost nothing on disk, in downloads or in GPU memory.
+    """
+    compacted = {}
+    for name, texture in textures.items():
+        value = constant_value(texture, tolerance)
+        if value is None or is_constant(texture):
+            compacted[name] = texture
+        else:
+            compacted[name] = value.reshape((1, 1) + texture.shape[2:])
+    return compacted
+
+def to_image(texture):
+    """PIL image for a texture array (only needed when encoding to a file format)"""
+    if isinstance(texture, Image.Image):
+        return texture
+    # Texture arrays are uint8, so 2-D maps become 'L' images and HxWx3 maps 'RGB'
+    return Image.fromarray(texture)
+
+def _buffer(resolution, channels, out):
+    if out is not None:
+        return out
+    shape = (resolution, resolution) if channels == 1 else (resolution, resolution, channels)
+    return np.empty(shape, dtype=np.uint8)
+
+def generate_albedo(mesh, resolution, out=None):
     """Generate base color texture"""
     # Simple gradient for now
-    img = np.zeros((resolution, resolution, 3), dtype=np.uint8)
+    img = _buffer(resolution, 3, out)
     
-    for i in range(resolution):
-        color = int((i / resolution) * 255)
-        img[i, :] = [color, color // 2, 200]
+    color = (np.arange(resolution) * 255 // resolution).astype(np.uint8)
+    img[:, :, 0] = color[:, None]
+    img[:, :, 1] = (color // 2)[:, None]
+    img[:, :, 2] = 200
     
-    return Image.fromarray(img)
+    return img
 
-def generate_normal(mesh, resolution):
+def generate_normal(mesh, resolution, out=None):
     """Generate normal map from mesh geometry"""
     # Placeholder: flat normal map
-    img = np.full((resolution, resolution, 3), 128, dtype=np.uint8)
+    img = _buffer(resolution, 3, out)
+    img[:, :, :2] = 128
     img[:, :, 2] = 255  # Point up (Z+)
     
-    return Image.fromarray(img)
+    return img
 
-def generate_roughness(mesh, resolution):
+def generate_roughness(mesh, resolution, out=None):
     """Generate roughness map"""
     # Medium roughness
-    img = np.full((resolution, resolution), 128, dtype=np.uint8)
-    return Image.fromarray(img, mode='L')
+    img = _buffer(resolution, 1, out)
+    img[...] = 128
+    return img
 
-def generate_metallic(mesh, resolution):
+def generate_metallic(mesh, resolution, out=None):
     """Generate metallic map"""
     # Non-metallic
-    img = np.zeros((resolution, resolution), dtype=np.uint8)
-    return Image.fromarray(img, mode='L')
+    img = _buffer(resolution, 1, out)
+    img[...] = 0
+    return img
 
-def generate_ao(mesh, resolution):
+def generate_ao(mesh, resolution, out=None):
     """Generate ambient occlusion map"""
     # Placeholder AO
-    img = np.full((resolution, resolution), 200, dtype=np.uint8)
-    return Image.fromarray(img, mode='L')
+    img = _buffer(resolution, 1, out)
+    img[...] = 200
+    return img
+
+def generate_orm(mesh, resolution, out=None):
+    """
+    Generate the ORM map directly (critical for iGPU)
+    
+    Each generator writes straight into its channel of one RGB buffer:
+    R = Occlusion, G = Roughness, B = Metallic
+    """
+    orm = _buffer(resolution, 3, out)
+    generate_ao(mesh, resolution, out=orm[:, :, 0])
+    generate_roughness(mesh, resolution, out=orm[:, :, 1])
+    generate_metallic(mesh, resolution, out=orm[:, :, 2])
+    return orm
 
 def pack_orm_texture(occlusion, roughness, metallic):
     """
-    Pack ORM into single RGB texture (critical for iGPU)
+    Pack separate single-channel maps (arrays or PIL images) into one ORM array
     R = Occlusion
     G = Roughness  
     B = Metallic
     """
-    print("  - Packing ORM texture...")
-    
-    # Convert to numpy
-    o = np.array(occlusion.convert('L'))
-    r = np.array(roughness.convert('L'))
-    m = np.array(metallic.convert('L'))
-    
-    # Stack into RGB
-    orm = np.stack([o, r, m], axis=-1)
-    
-    return Image.fromarray(orm.astype(np.uint8))
+    channels = [np.asarray(channel.convert('L') if isinstance(channel, Image.Image) else channel)
+                for channel in (occlusion, roughness, metallic)]
+    orm = np.empty(channels[0].shape + (3,), dtype=np.uint8)
+    for index, channel in enumerate(channels):
+        orm[:, :, index] = channel
+    return orm
 
 if __name__ == "__main__":
     # Test
@@ -3,7 +3,8 @@
 
 import trimesh
 import numpy as np
-from pathlib import Path
+
+from pipeline import artifacts
 
 def auto_rig_character(mesh, bone_limit=30):
     """
@@ -24,11 +25,9 @@ def auto_rig_character(mesh, bone_limit=30):
     # Generate skinning weights
     weights = automatic_skinning(mesh, skeleton)
     
-    # Save skeleton data
-    output_dir = Path("outputs/rigging")
-    output_dir.mkdir(parents=True, exist_ok=True)
-    
-    save_skeleton(skeleton, output_dir / "skeleton.json")
+    # Capture skeleton data (when debug artifacts are enabled)
+    artifacts.save_json("rigging", "skeleton", skeleton)
+    artifacts.save_arrays("rigging", "weights", weights=weights)
     
     print(f"Rigging complete: {len(skeleton['bones'])} bones")
     
@@ -159,12 +158,6 @@ def automatic_skinning(mesh, skeleton):
     
     return weights
 
-def save_skeleton(skeleton, filepath):
-    """Save skeleton to JSON"""
-    import json
-    with open(filepath, 'w') as f:
-        json.dump(skeleton, f, indent=2)
-
 if __name__ == "__main__":
     # Test
     mesh = trimesh.creation.cylinder(height=2, radius=0.3, sections=8)
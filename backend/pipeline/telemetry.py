@@ -0,0 +1,129 @@
+# Pipeline Telemetry - Per-process stage timings and write accounting
+# Workers record locally; the server drains and aggregates into /metrics
+
+import functools
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import resource  # Unix only
+except ImportError:
+    resource = None
+
+_lock = threading.Lock()
+_timings = []        # (stage, seconds)
+_bytes_written = 0
+_written = []        # paths written (or reused), for the server's artifact store
+_models = {}         # model name -> load stats; current state, kept across drains
+
+@contextmanager
+def stage_timer(stage: str):
+    """Record how long the enclosed block takes under `stage`"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(stage, time.perf_counter() - started)
+
+def timed(stage: str = None):
+    """Decorator form of stage_timer; defaults to the function name"""
+    def decorator(fn):
+        name = stage or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage_timer(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+def record_timing(stage: str, seconds: float):
+    with _lock:
+        _timings.append((stage, seconds))
+
+def record_write(path_or_size):
+    """Count bytes written to disk (pass a path after writing, or a byte count)"""
+    global _bytes_written
+
+    path = None
+    if isinstance(path_or_size, int):
+        size = path_or_size
+    else:
+        try:
+            size = Path(path_or_size).stat().st_size
+        except OSError:
+            return
+        path = str(path_or_size)
+
+    with _lock:
+        _bytes_written += size
+        if path is not None:
+            _written.append(path)
+
+def record_reuse(path):
+    """Report an existing file as used again (refreshes it in the artifact store, no bytes counted)"""
+    with _lock:
+        _written.append(str(path))
+
+def record_model(name: str, **info):
+    """Record a loaded model's stats (load_seconds, resident_bytes, ...)"""
+    with _lock:
+        _models[name] = info
+
+def record_dir(directory):
+    """record_write every file in a directory (exports that also write .mtl/textures)"""
+    for path in Path(directory).iterdir():
+        if path.is_file():
+            record_write(path)
+
+def peak_rss_bytes() -> int:
+    """Peak resident set size of this process (0 when it can't be measured)"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS reports bytes
+        return peak if sys.platform == "darwin" else peak * 1024
+
+    try:
+        import psutil
+    except ImportError:
+        return 0
+    memory = psutil.Process().memory_info()
+    # peak_wset is Windows' peak working set; elsewhere fall back to current RSS
+    return getattr(memory, 'peak_wset', memory.rss)
+
+def absorb(drained: dict):
+    """Fold another process's drain() (a helper pool process) into this one's records"""
+    global _bytes_written
+
+    with _lock:
+        _timings.extend(drained.get('timings', []))
+        _bytes_written += drained.get('bytes_written', 0)
+        _written.extend(drained.get('written', []))
+
+def drain() -> dict:
+    """
+    Take everything recorded since the last drain
+
+    Returns:
+        Dict with 'timings' [(stage, seconds)], 'bytes_written', 'written'
+        (paths), 'models' (latest load stats) and 'peak_rss_bytes'
+    """
+    global _timings, _bytes_written, _written
+
+    with _lock:
+        timings, written, paths = _timings, _bytes_written, _written
+        _timings, _bytes_written, _written = [], 0, []
+        models = {name: dict(info) for name, info in _models.items()}
+
+    return {
+        'timings': timings,
+        'bytes_written': written,
+        'written': paths,
+        'models': models,
+        'peak_rss_bytes': peak_rss_bytes()
+    }
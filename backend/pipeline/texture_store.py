@@ -0,0 +1,62 @@
+# Texture Store - Content-addressed PNG textures shared across assets
+# Identical maps (same pixels) are encoded and written once, then referenced
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from pipeline.stage4_textures import to_image
+from pipeline.telemetry import record_reuse, record_write
+
+TEXTURE_STORE_DIR = Path(os.environ.get("MINEDEV_TEXTURE_STORE_DIR", "outputs/textures"))
+
+def texture_key(texture) -> str:
+    """Content hash of a texture array (shape and pixels)"""
+    texture = np.ascontiguousarray(texture)
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{texture.shape}:{texture.dtype}".encode('utf-8'))
+    digest.update(texture.data)
+    return digest.hexdigest()
+
+class TextureStore:
+    """PNG files named by content hash, fanned out into subdirectories"""
+
+    def __init__(self, root=TEXTURE_STORE_DIR):
+        self.root = Path(root)
+
+    def path_for(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.png"
+
+    def put(self, texture) -> Path:
+        """
+        Store a texture array, reusing the existing file for identical content
+
+        Returns:
+            Path of the PNG
+        """
+        path = self.path_for(texture_key(texture))
+        if path.exists():
+            record_reuse(path)  # Shared textures stay fresh in the artifact store's LRU
+            return path
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.stem}.{os.getpid()}.{threading.get_ident()}.tmp")
+        to_image(texture).save(tmp_path, format="PNG")
+        os.replace(tmp_path, path)
+        record_write(path)
+        return path
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_texture_store() -> TextureStore:
+    """Process-wide texture store"""
+    global _store
+
+    with _store_lock:
+        if _store is None:
+            _store = TextureStore()
+    return _store
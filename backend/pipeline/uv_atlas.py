@@ -0,0 +1,198 @@
+# UV Atlas - Cached, parallel xatlas parametrization packed into one atlas
+# Large meshes are split into face groups, unwrapped in worker processes and shelf-packed
+
+import math
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import trimesh
+
+from pipeline.parallel import PIPELINE_PROCESSES, run_parallel
+from pipeline.progressive_mesh import geometry_key
+from pipeline.telemetry import stage_timer
+
+UV_PARALLEL_MIN_FACES = int(os.environ.get("MINEDEV_UV_PARALLEL_MIN_FACES", 20000))
+UV_CACHE_SIZE = 16      # Parametrizations kept per process, keyed by geometry
+UV_PADDING = 0.01       # Gap between packed groups, as a fraction of the atlas
+
+def _parametrize(vertices, faces):
+    """Worker entry point: xatlas on one face group"""
+    import xatlas
+
+    return xatlas.parametrize(vertices, faces)
+
+def partition_faces(mesh, max_faces: int):
+    """
+    Split a mesh's faces into groups of about `max_faces`
+
+    Connected components are kept whole where they fit (their borders are
+    seams anyway); larger ones are cut into slabs along their longest axis,
+    and small ones are binned together so every task is worth a process.
+
+    Returns:
+        List of face index arrays
+    """
+    labels = trimesh.graph.connected_component_labels(mesh.face_adjacency, node_count=len(mesh.faces))
+    order = np.argsort(labels, kind='stable')
+    components = np.split(order, np.flatnonzero(np.diff(labels[order])) + 1)
+
+    centroids = mesh.triangles_center
+    pieces = []
+    for faces in components:
+        if len(faces) <= max_faces:
+            pieces.append(faces)
+            continue
+        axis = np.argmax(np.ptp(centroids[faces], axis=0))
+        faces = faces[np.argsort(centroids[faces, axis], kind='stable')]
+        pieces.extend(np.array_split(faces, math.ceil(len(faces) / max_faces)))
+
+    groups, pending, pending_faces = [], [], 0
+    for faces in sorted(pieces, key=len, reverse=True):
+        pending.append(faces)
+        pending_faces += len(faces)
+        if pending_faces >= max_faces:
+            groups.append(np.concatenate(pending))
+            pending, pending_faces = [], 0
+    if pending:
+        groups.append(np.concatenate(pending))
+    return groups
+
+def pack_groups(uvs, areas):
+    """
+    Shelf-pack per-group UV layouts into one unit square
+
+    Each group is scaled so its UV area matches its share of surface area,
+    keeping texel density even across groups.
+
+    Args:
+        uvs: Per-group (n, 2) UVs, each in its own [0, 1] layout
+        areas: Per-group (3D surface area, UV area)
+
+    Returns:
+        List of packed (n, 2) UVs
+    """
+    boxes = []
+    for uv, (surface, uv_area) in zip(uvs, areas):
+        low = uv.min(axis=0)
+        size = np.maximum(uv.max(axis=0) - low, 1e-9)
+        scale = math.sqrt(surface / uv_area) if uv_area > 0 and surface > 0 else 1.0
+        boxes.append((low, scale, size * scale))
+
+    total = sum(float(np.prod(box[2])) for box in boxes)
+    padding = UV_PADDING * math.sqrt(total)
+    width = max(math.sqrt(total) * 1.1, max(box[2][0] for box in boxes))
+
+    # Tallest first; start a new shelf when the row is full
+    placements = [None] * len(boxes)
+    x = y = shelf = 0.0
+    for index in sorted(range(len(boxes)), key=lambda i: -boxes[i][2][1]):
+        w, h = boxes[index][2]
+        if x > 0 and x + w > width:
+            x, y, shelf = 0.0, y + shelf + padding, 0.0
+        placements[index] = (x, y)
+        x += w + padding
+        shelf = max(shelf, h)
+
+    extent = max(width, y + shelf)
+    packed = []
+    for uv, (low, scale, _), (px, py) in zip(uvs, boxes, placements):
+        packed.append(((uv - low) * scale + (px, py)) / extent)
+    return packed
+
+def _uv_area(uv, faces):
+    corners = uv[faces]
+    edges_a = corners[:, 1] - corners[:, 0]
+    edges_b = corners[:, 2] - corners[:, 0]
+    return float(np.abs(edges_a[:, 0] * edges_b[:, 1] - edges_a[:, 1] * edges_b[:, 0]).sum() / 2)
+
+def parametrize(mesh):
+    """
+    xatlas parametrization of a whole mesh, in parallel when it's large
+
+    Large meshes are split into one face group per process of the shared
+    pipeline pool (MINEDEV_PIPELINE_PROCESSES).
+
+    Returns:
+        (vmapping, faces, uvs) like xatlas.parametrize: output vertex i is
+        input vertex vmapping[i], faces index output vertices and keep the
+        input face order
+    """
+    vertices = np.asarray(mesh.vertices, dtype=np.float32)
+    faces = np.asarray(mesh.faces, dtype=np.uint32)
+
+    if PIPELINE_PROCESSES <= 1 or len(faces) < UV_PARALLEL_MIN_FACES:
+        return _parametrize(vertices, faces)
+
+    groups = partition_faces(mesh, math.ceil(len(faces) / PIPELINE_PROCESSES))
+    if len(groups) == 1:
+        return _parametrize(vertices, faces)
+
+    # Each group is submitted with its own compact vertex list
+    tasks = []
+    for group in groups:
+        used, local = np.unique(faces[group], return_inverse=True)
+        tasks.append((used, vertices[used], local.reshape(-1, 3).astype(np.uint32)))
+
+    results = [None] * len(tasks)
+    for index, result in run_parallel(_parametrize, [(task[1], task[2]) for task in tasks]):
+        results[index] = result
+
+    areas = [
+        (float(mesh.area_faces[group].sum()), _uv_area(uv, indices))
+        for group, (_, indices, uv) in zip(groups, results)
+    ]
+    packed = pack_groups([uv for _, _, uv in results], areas)
+
+    vmapping, uvs = [], []
+    out_faces = np.empty((len(faces), 3), dtype=np.uint32)
+    offset = 0
+    for group, (used, _, _), (local_mapping, indices, _), uv in zip(groups, tasks, results, packed):
+        vmapping.append(used[local_mapping])
+        uvs.append(uv)
+        out_faces[group] = indices + offset
+        offset += len(local_mapping)
+
+    return np.concatenate(vmapping), out_faces, np.concatenate(uvs).astype(np.float32)
+
+def is_closed(mesh) -> bool:
+    """Watertight once UV seams (vertices split by unwrap) are welded back"""
+    return trimesh.Trimesh(vertices=mesh.vertices, faces=mesh.faces).is_watertight
+
+_atlases = OrderedDict()  # geometry key -> (vmapping, faces, uvs), least recently used first
+_atlases_lock = threading.Lock()
+
+def unwrap(mesh):
+    """
+    Mesh with an xatlas UV atlas, cached by geometry
+
+    Vertices are split along UV seams using xatlas' vmapping, so the
+    returned mesh has one UV per vertex.
+
+    Raises:
+        ImportError: xatlas is not installed
+    """
+    import xatlas  # Fail fast so callers can fall back
+
+    key = geometry_key(mesh)
+    with _atlases_lock:
+        atlas = _atlases.get(key)
+        if atlas is not None:
+            _atlases.move_to_end(key)
+
+    if atlas is None:
+        with stage_timer('uv_parametrize'):
+            atlas = parametrize(mesh)
+        with _atlases_lock:
+            _atlases[key] = atlas
+            while len(_atlases) > UV_CACHE_SIZE:
+                _atlases.popitem(last=False)
+
+    vmapping, faces, uvs = atlas
+    return trimesh.Trimesh(
+        vertices=np.asarray(mesh.vertices)[vmapping],
+        faces=faces.astype(np.int64),
+        visual=trimesh.visual.TextureVisuals(uv=uvs),
+        process=False
+    )
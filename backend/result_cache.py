@@ -0,0 +1,173 @@
+# Result Cache - Content-addressed GLB cache for /api/generate
+# Repeat prompts are served from disk instead of re-running the pipeline
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+# Bump whenever pipeline output changes so stale entries stop matching
+PIPELINE_VERSION = "16.1"
+
+CACHE_DIR = Path(os.environ.get("MINEDEV_CACHE_DIR", "outputs/cache"))
+CACHE_MAX_BYTES = int(os.environ.get("MINEDEV_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+
+def request_key(prompt: str, asset_type: str, features: dict, seed: int = 0,
+                pipeline_version: str = PIPELINE_VERSION) -> str:
+    """
+    Canonical content hash of a generation request
+
+    Keys are stable across dict ordering and whitespace, so the same
+    prompt/type/features/seed always lands on the same cache entry.
+    """
+    payload = {
+        'prompt': prompt,
+        'type': asset_type,
+        'features': features,
+        'seed': seed,
+        'pipeline_version': pipeline_version
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+class ResultCache:
+    """Disk-backed, size-bounded LRU cache of generated GLB files"""
+
+    def __init__(self, root=CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.index_path = self.root / "index.json"
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> {'file', 'name', 'size', 'stats', 'created'}
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._load_index()
+
+    def get(self, key: str):
+        """
+        Look up a cached result
+
+        Returns:
+            Entry dict with 'file' and 'stats', or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not (self.root / entry['file']).exists():
+                if entry is not None:
+                    self._drop(key)
+                    self._save_index()
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry)
+
+    def put(self, key: str, glb_bytes: bytes, stats: dict, name: str = None):
+        """
+        Store a generated GLB under its request key
+
+        Args:
+            name: Human-friendly download name to hand back on hits
+
+        Returns:
+            The stored entry, or None when the result is larger than the cache
+        """
+        size = len(glb_bytes)
+        if size > self.max_bytes:
+            return None
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        filename = f"{key}.glb"
+
+        # Write to a temp file first so readers never see a partial GLB
+        tmp_path = self.root / f".{filename}.tmp"
+        tmp_path.write_bytes(glb_bytes)
+        os.replace(tmp_path, self.root / filename)
+
+        entry = {
+            'file': filename,
+            'name': name or filename,
+            'size': size,
+            'stats': stats,
+            'created': time.time()
+        }
+
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries[key]['size']
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._bytes += size
+            self._evict()
+            self._save_index()
+
+        return dict(entry)
+
+    def path_for(self, filename: str):
+        """Resolve a cached GLB filename to its path, or None if not cached"""
+        path = self.root / Path(filename).name
+        return path if path.exists() else None
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current occupancy"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes
+            }
+
+    def _evict(self):
+        """Drop least recently used entries until under the byte budget"""
+        while self._bytes > self.max_bytes and self._entries:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry['size']
+        try:
+            (self.root / entry['file']).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _load_index(self):
+        if not self.index_path.exists():
+            return
+
+        try:
+            with open(self.index_path) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            print("WARNING: Result cache index unreadable, starting empty")
+            return
+
+        # Oldest first so recency survives restarts
+        for key, entry in sorted(saved.items(), key=lambda item: item[1]['created']):
+            if (self.root / entry['file']).exists():
+                self._entries[key] = entry
+                self._bytes += entry['size']
+
+        self._evict()
+
+    def _save_index(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix(".json.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(self._entries, f)
+        os.replace(tmp_path, self.index_path)
@@ -1,17 +1,78 @@
 # MINEDEV V16.0 - Working Backend Server
 # Simplified and functional
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse, FileResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 import asyncio
 import json
+import os
+import shutil
+import time
+from contextlib import asynccontextmanager
 from pathlib import Path
-import trimesh
-import numpy as np
+from typing import List
 
-app = FastAPI(title="MINEDEV V16.0 - Production Ready")
+import metrics
+from admission import AdmissionController
+from artifact_store import ArtifactStore
+from coalescer import RequestCoalescer
+from downloads import bytes_response, etag_for_bytes, file_response
+from executor import POOL_WORKERS, run_in_pool_with_progress, shutdown_pool, start_pool, warm_up_pool
+from jobs import JobManager
+from pipeline.quality import QUALITY_TIERS, quality_name
+from result_cache import ResultCache, request_key
+
+# Worker-side entry points, imported only inside pool processes so the server
+# itself never loads torch/trimesh
+BUILD_ASSET = "generation:build_asset"
+BUILD_BATCH = "generation:build_batch"
+SAMPLE_GROUP = "generation:sample_group"
+FINISH_ITEM = "generation:finish_item"
+
+# Batch groups are split into pool calls of at most this many items, and at
+# most BATCH_CONCURRENCY of them run at once per batch job
+BATCH_CHUNK_SIZE = int(os.environ.get("MINEDEV_BATCH_CHUNK_SIZE", 8))
+BATCH_CONCURRENCY = int(os.environ.get("MINEDEV_BATCH_CONCURRENCY", POOL_WORKERS))
+
+warmup_state = {"ready": False, "started": None, "finished": None, "workers": 0, "error": None}
+
+async def warm_up_workers():
+    """Spawn pool workers and preload templates/models after the socket is up"""
+    warmup_state["started"] = time.time()
+    try:
+        workers = await warm_up_pool("generation:warm_up")
+        for worker in workers:
+            observe_worker(worker['telemetry'])
+        warmup_state["workers"] = len({worker['pid'] for worker in workers})
+        if warmup_state["workers"] < max(1, POOL_WORKERS):
+            raise RuntimeError(f"only {warmup_state['workers']} of {max(1, POOL_WORKERS)} workers warmed up")
+        warmup_state["ready"] = True
+        print(f"✓ Warm-up complete: {warmup_state['workers']} workers ready")
+    except Exception as e:
+        warmup_state["error"] = str(e)
+        print(f"WARNING: Worker warm-up failed: {e}")
+    warmup_state["finished"] = time.time()
+
+@asynccontextmanager
+async def lifespan(app):
+    start_pool(initializer="generation:init_worker")
+    await job_manager.start()
+    # Not awaited: startup finishes (and the socket binds) while workers warm up
+    warmup_task = asyncio.create_task(warm_up_workers())
+    sweeper_task = asyncio.create_task(artifact_store.run())
+    yield
+    warmup_task.cancel()
+    sweeper_task.cancel()
+    await job_manager.stop()
+    shutdown_pool()
+
+app = FastAPI(title="MINEDEV V16.0 - Production Ready", lifespan=lifespan)
+result_cache = ResultCache()
+
+OUTPUT_DIR = Path("outputs")
+artifact_store = ArtifactStore(OUTPUT_DIR)
 
 # CORS
 app.add_middleware(
@@ -26,6 +87,11 @@ class GenerationRequest(BaseModel):
     prompt: str
     type: str = "asset"
     features: dict = {}
+    seed: int = 0
+    delivery: str = "file"  # "file" (outputs/jobs/<id>/) or "memory" (stream from RAM)
+
+class BatchRequest(BaseModel):
+    items: List[GenerationRequest]
 
 @app.get("/")
 async def root():
@@ -41,157 +107,315 @@ async def root():
 
 @app.get("/health")
 async def health():
-    return {"status": "healthy", "models": "ready"}
+    return {"status": "healthy", "models": "ready" if warmup_state["ready"] else "warming"}
 
-@app.post("/api/generate")
-async def generate_3d(request: GenerationRequest):
-    """Generate 3D model from text prompt"""
+@app.get("/health/live")
+async def liveness():
+    """Process is up and serving; never depends on model state"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness():
+    """Workers spawned and models loaded; route traffic only when this is 200"""
+    if not warmup_state["ready"]:
+        return JSONResponse(status_code=503, content={"status": "warming", **warmup_state})
+    return {"status": "ready", **warmup_state}
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus text-format metrics"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    return result_cache.stats()
+
+@app.get("/api/artifacts/stats")
+async def artifact_stats():
+    return artifact_store.stats()
+
+def job_artifact_dir(job_id):
+    return OUTPUT_DIR / "jobs" / job_id
+
+def write_job_file(job_id, filename, glb=None, source_path=None):
+    """
+    Place a GLB under outputs/jobs/<job_id>/ so concurrent jobs never share
+    a path. Cached GLBs are hard-linked rather than copied.
+
+    Returns:
+        Path of the file
+    """
+    job_dir = job_artifact_dir(job_id)
+    job_dir.mkdir(parents=True, exist_ok=True)
+    target = job_dir / filename
     
-    async def stream_progress():
+    if source_path is not None:
         try:
-            # Progress updates
-            yield json.dumps({"stage": "init", "progress": 0, "message": f"Starting generation: {request.prompt}"}) + "\n"
-            await asyncio.sleep(0.5)
-            
-            yield json.dumps({"stage": "multiview", "progress": 20, "message": "Generating multi-view images..."}) + "\n"
-            await asyncio.sleep(1)
-            
-            yield json.dumps({"stage": "reconstruction", "progress": 50, "message": "Reconstructing 3D mesh..."}) + "\n"
-            await asyncio.sleep(1)
-            
-            yield json.dumps({"stage": "cleanup", "progress": 75, "message": "Optimizing geometry..."}) + "\n"
-            await asyncio.sleep(0.5)
-            
-            # Create placeholder mesh
-            output_dir = Path("outputs")
-            output_dir.mkdir(exist_ok=True)
-            
-            # Generate appropriate mesh based on type
-            if request.type == "doll" or "doll" in request.prompt.lower():
-                mesh = create_doll_mesh()
-                filename = "doll_generated.glb"
-            elif request.type == "character" or any(word in request.prompt.lower() for word in ["robot", "warrior", "character"]):
-                mesh = create_character_mesh()
-                filename = "character_generated.glb"
-            elif "environment" in request.type.lower() or any(word in request.prompt.lower() for word in ["castle", "wall", "building"]):
-                mesh = create_environment_mesh()
-                filename = "environment_generated.glb"
-            else:
-                mesh = create_default_mesh()
-                filename = "asset_generated.glb"
-            
-            # Export
-            output_path = output_dir / filename
-            mesh.export(output_path)
-            
-            yield json.dumps({"stage": "export", "progress": 95, "message": "Exporting GLB..."}) + "\n"
-            await asyncio.sleep(0.3)
-            
-            yield json.dumps({
-                "stage": "complete",
-                "progress": 100,
-                "message": "✅ Generation complete!",
-                "file": filename,
-                "stats": {
-                    "vertices": len(mesh.vertices),
-                    "faces": len(mesh.faces),
-                    "watertight": mesh.is_watertight,
-                    "volume": float(mesh.volume) if mesh.volume else 0
-                }
-            }) + "\n"
-            
-        except Exception as e:
-            yield json.dumps({"stage": "error", "message": str(e)}) + "\n"
+            os.link(source_path, target)
+        except FileExistsError:
+            pass
+        except OSError:
+            shutil.copyfile(source_path, target)
+    else:
+        target.write_bytes(glb)
+        metrics.BYTES_WRITTEN.inc(len(glb), source="artifacts")
     
-    return StreamingResponse(stream_progress(), media_type="application/x-ndjson")
+    artifact_store.track(target)
+    return target
 
-@app.get("/api/download/{filename}")
-async def download_file(filename: str):
-    """Download generated 3D file"""
-    file_path = Path("outputs") / filename
-    if not file_path.exists():
-        raise HTTPException(status_code=404, detail=f"File not found: {filename}")
-    return FileResponse(file_path, media_type="model/gltf-binary", filename=filename)
+def observe_worker(telemetry):
+    """Fold a worker's telemetry into /metrics and register the files it wrote"""
+    metrics.observe_telemetry(telemetry)
+    for path in telemetry.get('written', []):
+        artifact_store.track(path)
 
-# Helper functions to create different mesh types
+def publish_artifact(job, filename, glb=None, source_path=None):
+    """
+    Attach the finished GLB to its job
 
-def create_doll_mesh():
-    """Create cute doll-like character"""
-    # Head (larger, cute proportions)
-    head = trimesh.creation.icosphere(subdivisions=3, radius=0.4)
-    head.apply_translation([0, 0.9, 0])
+    "memory" delivery keeps the serialized GLB in the job and streams it from
+    there; "file" delivery writes it to the job's own directory.
+
+    Returns:
+        Path of the artifact relative to outputs/, or None for memory delivery
+    """
+    if job.request.delivery == "memory":
+        if glb is None:
+            glb = source_path.read_bytes()
+        job.artifact = {'filename': filename, 'data': glb, 'etag': etag_for_bytes(glb)}
+        return None
     
-    # Body (rounded, cute)
-    body = trimesh.creation.capsule(height=0.8, radius=0.25, sections=32)
-    body.apply_translation([0, 0.3, 0])
+    target = write_job_file(job.id, filename, glb, source_path)
+    job.artifact = {'filename': filename, 'path': target}
+    return target.relative_to(OUTPUT_DIR).as_posix()
+
+async def run_generation(job):
+    """Generate 3D model for a queued job, emitting progress events"""
+    request = job.request
+    cache_key = request_key(request.prompt, request.type, request.features, request.seed)
+    download_url = f"/api/jobs/{job.id}/result"
     
-    # Arms (small, cute)
-    left_arm = trimesh.creation.capsule(height=0.5, radius=0.08, sections=16)
-    left_arm.apply_transform(trimesh.transformations.rotation_matrix(np.pi/4, [0, 0, 1]))
-    left_arm.apply_translation([-0.3, 0.5, 0])
+    # Progress updates
+    await job.emit({"stage": "init", "progress": 0, "job_id": job.id, "message": f"Starting generation: {request.prompt}"})
     
-    right_arm = trimesh.creation.capsule(height=0.5, radius=0.08, sections=16)
-    right_arm.apply_transform(trimesh.transformations.rotation_matrix(-np.pi/4, [0, 0, 1]))
-    right_arm.apply_translation([0.3, 0.5, 0])
+    # Repeat request: serve the stored GLB without regenerating
+    cached = result_cache.get(cache_key)
+    cached_path = result_cache.path_for(cached['file']) if cached is not None else None
+    if cached_path is not None:
+        # (an entry evicted since the lookup has no path and is regenerated below)
+        filename = cached.get('name', cached['file'])
+        relative = await asyncio.to_thread(publish_artifact, job, filename, source_path=cached_path)
+        result = {"file": relative or filename, "download_url": download_url, "cached": True, "stats": cached['stats']}
+        await job.emit({"stage": "complete", "progress": 100, "message": "✅ Generation complete! (cached)", **result})
+        return result
     
-    # Legs (short, cute proportions)
-    left_leg = trimesh.creation.capsule(height=0.4, radius=0.1, sections=16)
-    left_leg.apply_translation([-0.12, -0.2, 0])
+    # Run the real pipeline in a worker process; stage callbacks stream back as events.
+    # Concurrent requests of the same tier sample in one worker call, then finish separately
+    started = time.perf_counter()
+    try:
+        built = await coalescer.build(
+            quality_name(request.features), job, request.prompt, request.type, request.features, request.seed
+        )
+    except Exception:
+        metrics.GENERATIONS.inc(outcome="error")
+        raise
+    metrics.GENERATION_LATENCY.observe(time.perf_counter() - started, kind="single", quality=quality_name(request.features))
+    metrics.GENERATIONS.inc(outcome="success")
+    filename = built['filename']
+    stats = built['stats']
     
-    right_leg = trimesh.creation.capsule(height=0.4, radius=0.1, sections=16)
-    right_leg.apply_translation([0.12, -0.2, 0])
+    entry = await asyncio.to_thread(result_cache.put, cache_key, built['glb'], stats, filename)
+    if entry is not None:
+        metrics.BYTES_WRITTEN.inc(entry['size'], source="cache")
+    cached_path = result_cache.path_for(entry['file']) if entry is not None else None
+    if cached_path is not None and request.delivery != "memory":
+        relative = await asyncio.to_thread(publish_artifact, job, filename, source_path=cached_path)
+    else:
+        relative = await asyncio.to_thread(publish_artifact, job, filename, glb=built['glb'])
     
-    mesh = trimesh.util.concatenate([head, body, left_arm, right_arm, left_leg, right_leg])
-    return mesh
+    result = {
+        "file": relative or filename,
+        "download_url": download_url,
+        "cached": False,
+        "quality": quality_name(request.features),
+        "stats": stats,
+        "durations": built['durations']
+    }
+    await job.emit({"stage": "complete", "progress": 100, "message": "✅ Generation complete!", **result})
+    return result
 
-def create_character_mesh():
-    """Create character/robot warrior"""
-    # Torso (strong, heroic)
-    body = trimesh.creation.box([0.6, 0.8, 0.4])
-    body.apply_translation([0, 0.5, 0])
+async def run_batch(job):
+    """Generate every item of a batch job, streaming interleaved per-item events"""
+    items = job.request.items
+    results = [None] * len(items)
     
-    # Head
-    head = trimesh.creation.box([0.4, 0.4, 0.4])
-    head.apply_translation([0, 1.2, 0])
+    await job.emit({"stage": "init", "progress": 0, "job_id": job.id, "items": len(items), "message": f"Starting batch of {len(items)}"})
     
-    # Arms
-    left_arm = trimesh.creation.box([0.15, 0.6, 0.15])
-    left_arm.apply_translation([-0.4, 0.5, 0])
+    async def complete_item(index, result):
+        results[index] = result
+        await job.emit({"item": index, "stage": "complete", "progress": 100, "message": "✅ Item complete!", **result})
     
-    right_arm = trimesh.creation.box([0.15, 0.6, 0.15])
-    right_arm.apply_translation([0.4, 0.5, 0])
+    async def publish_item(index, name, glb=None, source_path=None):
+        target = await asyncio.to_thread(write_job_file, job.id, f"{index:04d}_{name}", glb, source_path)
+        return target.relative_to(OUTPUT_DIR).as_posix()
     
-    # Legs
-    left_leg = trimesh.creation.box([0.2, 0.8, 0.2])
-    left_leg.apply_translation([-0.15, -0.3, 0])
+    # Serve repeats from the result cache, group the rest by type and quality tier
+    groups = {}
+    keys = {}
+    for index, item in enumerate(items):
+        keys[index] = request_key(item.prompt, item.type, item.features, item.seed)
+        cached = result_cache.get(keys[index])
+        cached_path = result_cache.path_for(cached['file']) if cached is not None else None
+        if cached_path is not None:
+            relative = await publish_item(index, cached.get('name', cached['file']), source_path=cached_path)
+            await complete_item(index, {"file": relative, "cached": True, "stats": cached['stats']})
+        else:
+            groups.setdefault((item.type, quality_name(item.features)), []).append(index)
     
-    right_leg = trimesh.creation.box([0.2, 0.8, 0.2])
-    right_leg.apply_translation([0.15, -0.3, 0])
+    # Large groups are chunked so they spread over the pool and each worker
+    # only holds a chunk's textures and GLBs at a time
+    chunks = [
+        (quality, indices[start:start + BATCH_CHUNK_SIZE])
+        for (_, quality), indices in groups.items()
+        for start in range(0, len(indices), max(1, BATCH_CHUNK_SIZE))
+    ]
+    slots = asyncio.Semaphore(max(1, BATCH_CONCURRENCY))
     
-    mesh = trimesh.util.concatenate([body, head, left_arm, right_arm, left_leg, right_leg])
-    return mesh
-
-def create_environment_mesh():
-    """Create environment piece (wall/structure)"""
-    # Large wall section
-    wall = trimesh.creation.box([2.0, 2.0, 0.4])
+    async def run_chunk(quality, indices):
+        # One pool call per chunk: models load once, the chunk moves through
+        # the shared stages together and its prompts share sampling batches
+        async with slots:
+            started = time.perf_counter()
+            try:
+                built = await run_in_pool_with_progress(
+                    BUILD_BATCH, job.emit,
+                    [(i, items[i].prompt, items[i].type, items[i].features, items[i].seed) for i in indices]
+                )
+            except Exception as e:
+                metrics.GENERATIONS.inc(len(indices), outcome="error")
+                for index in indices:
+                    results[index] = {"error": str(e)}
+                return
+            metrics.GENERATION_LATENCY.observe(time.perf_counter() - started, kind="batch_group", quality=quality)
+            observe_worker(built['telemetry'])
+        
+        for result in built['items']:
+            index = result['item']
+            if 'error' in result:
+                metrics.GENERATIONS.inc(outcome="error")
+                results[index] = {"error": result['error']}
+                continue
+            
+            metrics.GENERATIONS.inc(outcome="success")
+            entry = await asyncio.to_thread(result_cache.put, keys[index], result['glb'], result['stats'], result['filename'])
+            if entry is not None:
+                metrics.BYTES_WRITTEN.inc(entry['size'], source="cache")
+            relative = await publish_item(index, result['filename'], glb=result['glb'])
+            await complete_item(index, {"file": relative, "cached": False, "stats": result['stats'], "durations": result['durations']})
     
-    # Add some detail (crenellations)
-    detail1 = trimesh.creation.box([0.3, 0.4, 0.3])
-    detail1.apply_translation([-0.7, 1.2, 0])
+    await asyncio.gather(*(run_chunk(quality, indices) for quality, indices in chunks))
     
-    detail2 = trimesh.creation.box([0.3, 0.4, 0.3])
-    detail2.apply_translation([0, 1.2, 0])
+    failed = sum(1 for result in results if result is None or "error" in result)
+    await job.emit({
+        "stage": "batch_complete",
+        "progress": 100,
+        "message": f"✅ Batch complete: {len(items) - failed}/{len(items)} succeeded",
+        "results": results
+    })
+    return {"items": len(items), "failed": failed, "results": results}
+
+job_manager = JobManager(run_generation)
+coalescer = RequestCoalescer(run_in_pool_with_progress, BUILD_ASSET, SAMPLE_GROUP, FINISH_ITEM, observe=observe_worker)
+admission = AdmissionController()
+metrics.register_runtime_gauges(job_manager, result_cache, artifact_store)
+
+def validate_request(request: GenerationRequest):
+    """Reject unknown option values before a job is queued"""
+    quality = quality_name(request.features)
+    if quality not in QUALITY_TIERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown quality tier '{quality}' (choose from {', '.join(QUALITY_TIERS)})"
+        )
+
+def admit(http_request: Request, cost: int = 1):
+    """Reject with 429 + Retry-After when the server or this client is over its limit"""
+    client = http_request.client.host if http_request.client else "unknown"
+    admission.admit(client, job_manager, cost)
+
+def stream_job_events(job, since=0):
+    async def stream():
+        async for event in job.stream(since):
+            yield json.dumps(event) + "\n"
     
-    detail3 = trimesh.creation.box([0.3, 0.4, 0.3])
-    detail3.apply_translation([0.7, 1.2, 0])
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+def get_job_or_404(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job
+
+@app.post("/api/generate")
+async def generate_3d(request: GenerationRequest, http_request: Request):
+    """Generate 3D model from text prompt, streaming progress as NDJSON"""
+    validate_request(request)
+    admit(http_request)
+    # The job keeps running if the client disconnects; reattach via /api/jobs/{id}/events
+    job = job_manager.submit(request)
+    return stream_job_events(job)
+
+@app.post("/api/generate/batch")
+async def generate_batch_3d(items: List[GenerationRequest], http_request: Request):
+    """Generate many assets in one job, streaming interleaved per-item progress as NDJSON"""
+    for item in items:
+        validate_request(item)
+    admit(http_request, cost=len(items))
+    job = job_manager.submit(BatchRequest(items=items), runner=run_batch, cost=len(items))
+    return stream_job_events(job)
+
+@app.post("/api/jobs")
+async def create_job(request: GenerationRequest, http_request: Request):
+    """Queue a generation and return its job ID immediately"""
+    validate_request(request)
+    admit(http_request)
+    job = job_manager.submit(request)
+    return {"job_id": job.id, "status": job.status}
+
+@app.get("/api/jobs/{job_id}")
+async def job_status(job_id: str):
+    return get_job_or_404(job_id).summary()
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(job_id: str, since: int = 0):
+    """Replay a job's progress events from `since`, then follow live"""
+    return stream_job_events(get_job_or_404(job_id), since)
+
+@app.get("/api/jobs/{job_id}/result")
+async def job_result(job_id: str, http_request: Request):
+    """Download a job's GLB, streamed from memory or disk (Range/ETag aware)"""
+    job = get_job_or_404(job_id)
+    if job.artifact is None:
+        raise HTTPException(status_code=409 if not job.done else 404, detail=f"Job {job_id} has no result ({job.status})")
     
-    mesh = trimesh.util.concatenate([wall, detail1, detail2, detail3])
-    return mesh
+    if 'data' in job.artifact:
+        return bytes_response(http_request, job.artifact['data'], job.artifact['filename'], etag=job.artifact['etag'])
+    if not job.artifact['path'].is_file():
+        raise HTTPException(status_code=410, detail=f"Result for job {job_id} has expired")
+    artifact_store.touch(job.artifact['path'])
+    return file_response(http_request, job.artifact['path'], job.artifact['filename'])
 
-def create_default_mesh():
-    """Create default asset mesh"""
-    return trimesh.creation.icosphere(subdivisions=2, radius=1.0)
+@app.get("/api/download/{filename:path}")
+async def download_file(filename: str, http_request: Request):
+    """Download a generated GLB from a job's directory (outputs/jobs/<id>/)"""
+    file_path = (OUTPUT_DIR / filename).resolve()
+    # Only job GLBs; never the cache, its index or the artifact store's index
+    if file_path.suffix.lower() != ".glb" or (OUTPUT_DIR / "jobs").resolve() not in file_path.parents:
+        raise HTTPException(status_code=404, detail=f"File not found: {filename}")
+    if not file_path.is_file():
+        raise HTTPException(status_code=404, detail=f"File not found: {filename}")
+    artifact_store.touch(file_path)
+    return file_response(http_request, file_path)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from admission import AdmissionController, TokenBucket
+
+def jobs(load=0, running=0, queued=0, workers=2):
+    return SimpleNamespace(load=load, in_flight=running, queue_depth=queued, workers=workers)
+
+def controller(**kwargs):
+    settings = dict(max_in_flight=2, max_queued=3, client_rate=0, client_burst=100)
+    settings.update(kwargs)
+    return AdmissionController(**settings)
+
+def test_admits_within_capacity():
+    controller().admit("client", jobs(load=4))
+
+def test_rejects_when_total_capacity_is_used():
+    with pytest.raises(HTTPException) as error:
+        controller().admit("client", jobs(load=5, running=2, queued=3))
+    assert error.value.status_code == 429
+    assert error.value.detail['reason'] == "capacity"
+    assert int(error.value.headers["Retry-After"]) >= 1
+
+def test_batch_is_charged_per_item():
+    admission = controller()
+    admission.admit("client", jobs(load=1), cost=4)
+    with pytest.raises(HTTPException) as error:
+        admission.admit("client", jobs(load=2), cost=4)
+    assert error.value.status_code == 429
+
+def test_batch_larger_than_capacity():
+    with pytest.raises(HTTPException) as error:
+        controller().admit("client", jobs(), cost=6)
+    assert error.value.status_code == 413
+
+def test_per_client_rate_limit():
+    admission = controller(client_burst=2)
+    admission.admit("a", jobs())
+    admission.admit("a", jobs())
+    with pytest.raises(HTTPException) as error:
+        admission.admit("a", jobs())
+    assert error.value.detail['reason'] == "rate_limit"
+    admission.admit("b", jobs())  # Other clients have their own bucket
+
+def test_large_batch_takes_whole_bucket():
+    admission = controller(client_burst=3)
+    admission.admit("a", jobs(), cost=5)
+    with pytest.raises(HTTPException):
+        admission.admit("a", jobs())
+
+def test_token_bucket_refill():
+    bucket = TokenBucket(rate=10, capacity=1)
+    assert bucket.take() == 0
+    wait = bucket.take()
+    assert 0 < wait <= 0.1
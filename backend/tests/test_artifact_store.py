@@ -0,0 +1,52 @@
+import time
+
+from artifact_store import ArtifactStore
+
+def write(path, size):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    return path
+
+def test_quota_evicts_least_recently_used(tmp_path):
+    store = ArtifactStore(tmp_path, max_bytes=20, ttl=3600)
+    old = write(tmp_path / "jobs" / "a" / "old.glb", 10)
+    new = write(tmp_path / "jobs" / "b" / "new.glb", 10)
+    store.track(old)
+    store.track(new)
+    store.touch(old)
+    store.track(write(tmp_path / "jobs" / "c" / "third.glb", 10))
+
+    assert store.sweep() == 1
+    assert old.exists()
+    assert not new.exists()
+    assert not new.parent.exists()  # Emptied job directories go too
+    assert store.stats()['bytes'] == 20
+
+def test_ttl_expiry(tmp_path):
+    store = ArtifactStore(tmp_path, max_bytes=10 ** 6, ttl=0.01)
+    path = write(tmp_path / "debug" / "mesh.npz", 5)
+    store.track(path)
+    time.sleep(0.05)
+
+    assert store.sweep() == 1
+    assert not path.exists()
+
+def test_excluded_and_outside_paths_are_ignored(tmp_path):
+    store = ArtifactStore(tmp_path / "outputs", max_bytes=0, ttl=3600)
+    store.track(write(tmp_path / "outputs" / "cache" / "k.glb", 5))
+    store.track(write(tmp_path / "elsewhere.glb", 5))
+
+    assert store.stats()['entries'] == 0
+
+def test_index_survives_restart(tmp_path):
+    store = ArtifactStore(tmp_path, max_bytes=10 ** 6, ttl=3600)
+    store.track(write(tmp_path / "jobs" / "a.glb", 7))
+    store.sweep()  # Saves the index
+
+    assert ArtifactStore(tmp_path).stats()['bytes'] == 7
+
+def test_adopts_files_without_an_index(tmp_path):
+    write(tmp_path / "jobs" / "a.glb", 3)
+    write(tmp_path / "cache" / "k.glb", 3)
+
+    assert ArtifactStore(tmp_path).stats()['entries'] == 1
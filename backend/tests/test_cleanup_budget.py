@@ -0,0 +1,41 @@
+import numpy as np
+import trimesh
+
+from pipeline import stage3_cleanup
+from pipeline.stage3_cleanup import MIN_PART_FACES, cleanup_parts
+
+def spheres(count, subdivisions=2):
+    parts = []
+    for i in range(count):
+        part = trimesh.creation.icosphere(subdivisions=subdivisions, radius=0.5 + 0.1 * (i % 3))
+        part.apply_translation([3.0 * i, 0, 0])
+        parts.append(part)
+    return parts
+
+def no_report(fraction, message):
+    pass
+
+def test_parts_stay_within_target():
+    parts = spheres(10, subdivisions=3)
+    merged = trimesh.util.concatenate(parts)
+    cleaned = cleanup_parts(parts, 2000, 32, merged.scale, no_report)
+    assert len(cleaned.faces) <= 2000
+
+def test_many_small_parts_stay_within_target():
+    parts = spheres(25, subdivisions=1)
+    merged = trimesh.util.concatenate(parts)
+    target = 25 * MIN_PART_FACES
+    cleaned = cleanup_parts(parts, target, 32, merged.scale, no_report)
+    assert len(cleaned.faces) <= target
+
+def test_too_many_parts_are_cleaned_as_one(monkeypatch):
+    cleaned_parts = []
+    monkeypatch.setattr(stage3_cleanup, "cleanup_parts", lambda parts, *args: cleaned_parts.append(parts))
+    monkeypatch.setattr(stage3_cleanup, "optimize_uvs_advanced", lambda mesh: mesh)
+
+    mesh = trimesh.util.concatenate(spheres(40, subdivisions=1))
+    cleaned = stage3_cleanup.cleanup_mesh(mesh, target_faces=40 * MIN_PART_FACES - 1, watertight_resolution=32)
+
+    assert cleaned_parts == []
+    assert len(cleaned.faces) <= 40 * MIN_PART_FACES - 1
+    assert np.isfinite(cleaned.vertices).all()
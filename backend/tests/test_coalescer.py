@@ -0,0 +1,86 @@
+import asyncio
+
+from coalescer import RequestCoalescer
+
+class FakeJob:
+    def __init__(self):
+        self.events = []
+
+    async def emit(self, event):
+        self.events.append(event)
+
+class FakePool:
+    """Stands in for run_in_pool_with_progress, recording every call"""
+
+    def __init__(self, fail=()):
+        self.calls = []
+        self.fail = fail
+
+    async def __call__(self, fn, on_event, *args):
+        self.calls.append(fn)
+        if fn == "build_asset":
+            prompt = args[0]
+            await on_event({"stage": "multiview"})
+            return {'filename': prompt, 'telemetry': {}}
+        if fn == "sample_group":
+            items = args[0]
+            for index, *_ in items:
+                await on_event({"item": index, "stage": "multiview"})
+            return {
+                'items': [
+                    {'item': index, 'error': "bad prompt"} if prompt in self.fail
+                    else {'item': index, 'state': prompt}
+                    for index, prompt, *_ in items
+                ],
+                'telemetry': {}
+            }
+        state = args[0]
+        await on_event({"stage": "cleanup"})
+        return {'filename': state, 'telemetry': {}}
+
+def coalescer(pool, **kwargs):
+    settings = dict(window=0.01, max_batch=4, enabled=True)
+    settings.update(kwargs)
+    return RequestCoalescer(pool, "build_asset", "sample_group", "finish_item", **settings)
+
+def run_all(coalescer, prompts, key="draft"):
+    async def main():
+        jobs = [FakeJob() for _ in prompts]
+        results = await asyncio.gather(
+            *(coalescer.build(key, job, prompt, "asset", {}, 0) for job, prompt in zip(jobs, prompts)),
+            return_exceptions=True
+        )
+        return jobs, results
+
+    return asyncio.run(main())
+
+def test_group_samples_once_then_finishes_per_item():
+    pool = FakePool()
+    jobs, results = run_all(coalescer(pool), ["a", "b", "c"])
+
+    assert pool.calls == ["sample_group", "finish_item", "finish_item", "finish_item"]
+    assert [result['filename'] for result in results] == ["a", "b", "c"]
+    # Every job gets its own events, untagged
+    assert all(job.events == [{"stage": "multiview"}, {"stage": "cleanup"}] for job in jobs)
+
+def test_lone_job_runs_build_asset():
+    pool = FakePool()
+    _, results = run_all(coalescer(pool), ["a"])
+    assert pool.calls == ["build_asset"]
+    assert results[0]['filename'] == "a"
+
+def test_full_group_starts_before_the_window():
+    pool = FakePool()
+    run_all(coalescer(pool, window=60, max_batch=2), ["a", "b"])
+    assert pool.calls == ["sample_group", "finish_item", "finish_item"]
+
+def test_failed_item_fails_only_its_job():
+    _, results = run_all(coalescer(FakePool(fail=("b",))), ["a", "b"])
+    assert results[0]['filename'] == "a"
+    assert isinstance(results[1], RuntimeError)
+
+def test_disabled_skips_the_window():
+    pool = FakePool()
+    _, results = run_all(coalescer(pool, window=60, enabled=False), ["a", "b"])
+    assert pool.calls == ["build_asset", "build_asset"]
+    assert [result['filename'] for result in results] == ["a", "b"]
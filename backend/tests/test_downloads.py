@@ -0,0 +1,102 @@
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+from downloads import bytes_response, etag_for_bytes, file_response, parse_range
+
+DATA = bytes(range(256)) * 4
+
+def test_parse_range():
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=50-500", 100) == (50, 99)
+    assert parse_range(None, 100) is None
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    assert parse_range("items=0-1", 100) is None
+
+def test_parse_range_unsatisfiable():
+    with pytest.raises(HTTPException) as error:
+        parse_range("bytes=200-", 100)
+    assert error.value.status_code == 416
+    assert error.value.headers["Content-Range"] == "bytes */100"
+
+@pytest.fixture
+def client(tmp_path):
+    path = tmp_path / "asset.glb"
+    path.write_bytes(DATA)
+
+    app = FastAPI()
+
+    @app.get("/memory")
+    def memory(request: Request):
+        return bytes_response(request, DATA, "asset.glb")
+
+    @app.get("/file")
+    def file(request: Request):
+        return file_response(request, path)
+
+    return TestClient(app)
+
+@pytest.mark.parametrize("url", ["/memory", "/file"])
+def test_full_body_with_etag(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.content == DATA
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["etag"]
+
+@pytest.mark.parametrize("url", ["/memory", "/file"])
+def test_range_request(client, url):
+    response = client.get(url, headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.content == DATA[10:20]
+    assert response.headers["content-range"] == f"bytes 10-19/{len(DATA)}"
+
+@pytest.mark.parametrize("url", ["/memory", "/file"])
+def test_if_none_match(client, url):
+    etag = client.get(url).headers["etag"]
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+@pytest.mark.parametrize("url", ["/memory", "/file"])
+def test_if_range(client, url):
+    etag = client.get(url).headers["etag"]
+
+    current = client.get(url, headers={"Range": "bytes=0-3", "If-Range": etag})
+    assert current.status_code == 206
+
+    stale = client.get(url, headers={"Range": "bytes=0-3", "If-Range": '"stale"'})
+    assert stale.status_code == 200
+    assert stale.content == DATA
+
+def test_etag_for_bytes_is_content_based():
+    assert etag_for_bytes(b"a") == etag_for_bytes(b"a")
+    assert etag_for_bytes(b"a") != etag_for_bytes(b"b")
+
+@pytest.fixture
+def server_client(tmp_path, monkeypatch):
+    import server
+
+    monkeypatch.setattr(server, "OUTPUT_DIR", tmp_path)
+    job_dir = tmp_path / "jobs" / "job1"
+    job_dir.mkdir(parents=True)
+    (job_dir / "asset.glb").write_bytes(DATA)
+    (tmp_path / "cache").mkdir()
+    (tmp_path / "cache" / "index.json").write_text("{}")
+    (tmp_path / "cache" / "abc.glb").write_bytes(DATA)
+    (tmp_path / ".artifact_index.json").write_text("{}")
+    return TestClient(server.app)  # No lifespan: the worker pool never starts
+
+def test_download_serves_job_glbs(server_client):
+    response = server_client.get("/api/download/jobs/job1/asset.glb")
+    assert response.status_code == 200
+    assert response.content == DATA
+
+@pytest.mark.parametrize("filename", [
+    "cache/index.json", "index.json", ".artifact_index.json", "cache/abc.glb", "abc.glb",
+    "jobs/job1/../../cache/abc.glb", "jobs/job1/missing.glb",
+])
+def test_download_refuses_everything_else(server_client, filename):
+    assert server_client.get(f"/api/download/{filename}").status_code == 404
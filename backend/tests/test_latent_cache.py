@@ -0,0 +1,58 @@
+import time
+
+import numpy as np
+
+from pipeline.latent_cache import LatentCache, latent_key
+
+def test_latent_key_covers_sampling_settings():
+    base = latent_key("a chair", 15.0, 64, 1e-3, 160, 0)
+    assert base == latent_key("a chair", 15, 64, 0.001, 160.0, 0)
+    assert base != latent_key("a chair", 15.0, 32, 1e-3, 160, 0)
+    assert base != latent_key("a chair", 15.0, 64, 1e-3, 160, 1)
+    assert base != latent_key("a chair", 15.0, 64, 1e-3, 160, 0, precision="bf16")
+
+def test_round_trip_as_memory_mapped_fp16(tmp_path):
+    cache = LatentCache(tmp_path)
+    latent = np.random.RandomState(0).randn(1, 64).astype(np.float32)
+    cache.put("k", latent)
+
+    loaded = cache.get("k")
+    assert isinstance(loaded, np.memmap)
+    assert loaded.dtype == np.float16
+    np.testing.assert_allclose(loaded, latent, atol=1e-2)
+
+def test_miss(tmp_path):
+    assert LatentCache(tmp_path).get("missing") is None
+
+def test_eviction_keeps_recently_used(tmp_path):
+    latent = np.zeros((1, 256), dtype=np.float32)
+    size = LatentCache(tmp_path / "probe").put("probe", latent).stat().st_size
+
+    cache = LatentCache(tmp_path / "cache", max_bytes=2 * size)
+    # Recency is file mtime, which the kernel only updates every few milliseconds
+    for step in (lambda: cache.put("a", latent), lambda: cache.put("b", latent),
+                 lambda: cache.get("a"), lambda: cache.put("c", latent)):
+        step()
+        time.sleep(0.02)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+def test_existing_files_are_adopted(tmp_path):
+    LatentCache(tmp_path).put("k", np.ones((1, 8)))
+    assert LatentCache(tmp_path).get("k") is not None
+
+def test_bound_holds_across_processes(tmp_path):
+    # Two workers' caches over one directory share the limit
+    latent = np.zeros((1, 256), dtype=np.float32)
+    size = LatentCache(tmp_path / "probe").put("probe", latent).stat().st_size
+    first = LatentCache(tmp_path / "cache", max_bytes=2 * size)
+    second = LatentCache(tmp_path / "cache", max_bytes=2 * size)
+
+    for index in range(6):
+        (first if index % 2 else second).put(f"k{index}", latent)
+        time.sleep(0.02)
+
+    assert sum(path.stat().st_size for path in (tmp_path / "cache").glob("*.npy")) <= 2 * size
+    assert first.get("k5") is not None and first.get("k4") is not None
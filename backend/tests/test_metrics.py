@@ -0,0 +1,66 @@
+import pytest
+
+import metrics
+from metrics import Counter, Gauge, Histogram, Registry
+
+def test_histogram_render():
+    histogram = Histogram("latency_seconds", "Latency", label_names=("stage",), buckets=(0.1, 1))
+    histogram.observe(0.05, stage="a")
+    histogram.observe(0.5, stage="a")
+
+    assert histogram.render() == [
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{le="0.1",stage="a"} 1',
+        'latency_seconds_bucket{le="1",stage="a"} 2',
+        'latency_seconds_bucket{le="+Inf",stage="a"} 2',
+        'latency_seconds_sum{stage="a"} 0.55',
+        'latency_seconds_count{stage="a"} 2',
+    ]
+
+def test_histogram_mean():
+    histogram = Histogram("h", "", label_names=("kind", "quality"))
+    histogram.observe(1, kind="asset", quality="draft")
+    histogram.observe(3, kind="asset", quality="high")
+
+    assert histogram.mean(kind="asset") == 2
+    assert histogram.mean(quality="high") == 3
+    assert histogram.mean(kind="batch") is None
+
+def test_counter_and_gauge_render():
+    counter = Counter("writes_total", "Writes", label_names=("source",))
+    counter.inc(3, source='say "hi"')
+    gauge = Gauge("depth", "Depth", callback=lambda: 4)
+
+    registry = Registry()
+    registry.register(counter)
+    registry.register(gauge)
+
+    assert registry.render().splitlines()[2:] == [
+        'writes_total{source="say \\"hi\\""} 3',
+        "# HELP depth Depth",
+        "# TYPE depth gauge",
+        "depth 4",
+    ]
+
+def test_gauge_set_max():
+    gauge = Gauge("peak", "Peak", label_names=("process",))
+    gauge.set_max(5, process="worker")
+    gauge.set_max(3, process="worker")
+    assert gauge.render()[-1] == 'peak{process="worker"} 5'
+
+@pytest.fixture
+def stage_latency(monkeypatch):
+    histogram = Histogram("stage", "", label_names=("stage",))
+    monkeypatch.setattr(metrics, "STAGE_LATENCY", histogram)
+    return histogram
+
+def test_pipeline_estimate_skips_nested_steps(stage_latency):
+    assert metrics.pipeline_estimate() is None
+
+    metrics.observe_telemetry({'timings': [
+        ("multiview", 10), ("sample_latents", 9),
+        ("cleanup", 4), ("make_watertight_advanced", 3), ("export", 1), ("export_glb", 1)
+    ]})
+
+    assert metrics.pipeline_estimate() == 15
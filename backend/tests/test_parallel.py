@@ -0,0 +1,34 @@
+import pytest
+
+from pipeline import parallel, telemetry
+
+@pytest.fixture
+def pool():
+    yield parallel.get_process_pool()
+    parallel.shutdown_process_pool()
+
+def test_default_fans_out():
+    assert parallel.PIPELINE_PROCESSES >= parallel.MIN_PIPELINE_PROCESSES
+
+def test_run_parallel_yields_every_result(pool):
+    results = dict(parallel.run_parallel(pow, [(2, 3), (3, 2), (5, 0)]))
+    assert results == {0: 8, 1: 9, 2: 1}
+
+def test_run_parallel_folds_in_pool_telemetry(pool):
+    telemetry.drain()
+    list(parallel.run_parallel(telemetry.record_write, [(5,), (7,)]))
+    assert telemetry.drain()['bytes_written'] == 12
+
+def test_shutdown_allows_a_fresh_pool(pool):
+    parallel.shutdown_process_pool()
+    assert dict(parallel.run_parallel(pow, [(2, 2)])) == {0: 4}
+
+def test_absorb_merges_helper_process_telemetry():
+    telemetry.drain()
+    telemetry.record_timing("unwrap", 1.0)
+    telemetry.absorb({'timings': [("unwrap_chart", 0.5)], 'bytes_written': 10, 'written': ["a.png"]})
+
+    drained = telemetry.drain()
+    assert drained['timings'] == [("unwrap", 1.0), ("unwrap_chart", 0.5)]
+    assert drained['bytes_written'] == 10
+    assert drained['written'] == ["a.png"]
@@ -0,0 +1,45 @@
+import numpy as np
+import trimesh
+
+from pipeline.progressive_mesh import ProgressiveMesh, decimate, geometry_key
+
+def sphere():
+    return trimesh.creation.icosphere(subdivisions=4)
+
+def test_extract_stays_within_budget():
+    record = ProgressiveMesh.build(sphere())
+    for budget in (2000, 500, 100):
+        assert len(record.extract(budget).faces) <= budget
+
+def test_extract_is_close_to_budget():
+    extracted = ProgressiveMesh.build(sphere()).extract(1000)
+    assert len(extracted.faces) >= 900
+
+def test_budget_above_face_count_returns_base_mesh():
+    mesh = sphere()
+    extracted = ProgressiveMesh.build(mesh).extract(len(mesh.faces) + 10)
+    assert len(extracted.faces) == len(mesh.faces)
+    np.testing.assert_allclose(extracted.vertices, mesh.vertices)
+
+def test_extraction_keeps_the_shape():
+    extracted = ProgressiveMesh.build(sphere()).extract(500)
+    radii = np.linalg.norm(extracted.vertices, axis=1)
+    assert abs(radii.mean() - 1.0) < 0.05
+
+def test_save_and_load(tmp_path):
+    record = ProgressiveMesh.build(sphere())
+    record.save(tmp_path / "record.npz")
+    loaded = ProgressiveMesh.load(tmp_path / "record.npz")
+
+    np.testing.assert_array_equal(loaded.extract(300).faces, record.extract(300).faces)
+
+def test_decimate_matches_record():
+    mesh = sphere()
+    assert len(decimate(mesh, 400).faces) == len(ProgressiveMesh.build(mesh).extract(400).faces)
+
+def test_geometry_key():
+    mesh = sphere()
+    moved = mesh.copy()
+    moved.vertices += 1.0
+    assert geometry_key(mesh) == geometry_key(mesh.copy())
+    assert geometry_key(mesh) != geometry_key(moved)
@@ -0,0 +1,58 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import trimesh
+
+from pipeline import artifacts, stage2_reconstruction
+from pipeline.stage2_reconstruction import extract_shap_e_meshes, reconstruct_3d_meshes
+
+def fake_xm():
+    return SimpleNamespace(renderer=SimpleNamespace(grid_size=128))
+
+def record_decodes(monkeypatch):
+    decodes = []
+
+    def decode_one(xm, latent):
+        time.sleep(0.01)  # Leave room for another thread to interfere
+        decodes.append((int(latent[0]), xm.renderer.grid_size, artifacts.current_capture()))
+        return trimesh.creation.box()
+
+    monkeypatch.setattr(stage2_reconstruction, "_decode_one", decode_one)
+    return decodes
+
+def test_concurrent_decodes_keep_their_grid(monkeypatch):
+    decodes = record_decodes(monkeypatch)
+    xm = fake_xm()
+
+    threads = [
+        threading.Thread(target=extract_shap_e_meshes, args=(xm, [np.full((2, 1), grid)]), kwargs={'decode_grid': grid})
+        for grid in (32, 64)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted((latent, grid) for latent, grid, _ in decodes) == [(32, 32), (32, 32), (64, 64), (64, 64)]
+    assert xm.renderer.grid_size == 128
+
+def test_batch_reports_and_tags_per_item(monkeypatch):
+    decodes = record_decodes(monkeypatch)
+    xm = fake_xm()
+    latent = lambda value, grid: {'type': 'shap_e_latent', 'xm': xm, 'latent': np.full((1, 1), value), 'decode_grid': grid}
+    events = {index: [] for index in range(3)}
+
+    meshes = reconstruct_3d_meshes(
+        [latent(0, 64), latent(1, 128), ["image"]],
+        fallback_meshes=[None, None, trimesh.creation.icosphere()],
+        progress=[lambda fraction, message, index=index: events[index].append(fraction) for index in range(3)],
+        captures=[(True, f"item{index}") for index in range(3)]
+    )
+
+    assert len(meshes) == 3 and len(meshes[2].faces) == 1280
+    assert sorted((value, grid, capture) for value, grid, capture in decodes) == [
+        (0, 64, (True, "item0")), (1, 128, (True, "item1"))
+    ]
+    assert all(events[index][0] == 0.0 and events[index][-1] == 1.0 for index in range(3))
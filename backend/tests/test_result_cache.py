@@ -0,0 +1,48 @@
+import json
+
+from result_cache import ResultCache, request_key
+
+def test_request_key_ignores_feature_order():
+    a = request_key("a chair", "asset", {"quality": "draft", "pbr_textures": True})
+    b = request_key("a chair", "asset", {"pbr_textures": True, "quality": "draft"})
+    assert a == b
+    assert a != request_key("a chair", "asset", {"quality": "draft"}, seed=1)
+
+def test_put_then_get(tmp_path):
+    cache = ResultCache(tmp_path)
+    cache.put("k", b"glb", {"faces": 1}, name="chair.glb")
+
+    entry = cache.get("k")
+    assert entry['name'] == "chair.glb"
+    assert entry['stats'] == {"faces": 1}
+    assert cache.path_for(entry['file']).read_bytes() == b"glb"
+    assert cache.stats()['hits'] == 1
+
+def test_lru_eviction_by_bytes(tmp_path):
+    cache = ResultCache(tmp_path, max_bytes=10)
+    cache.put("a", b"12345", {})
+    cache.put("b", b"12345", {})
+    cache.get("a")  # b becomes least recently used
+    cache.put("c", b"12345", {})
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()['evictions'] == 1
+
+def test_oversized_result_is_not_cached(tmp_path):
+    cache = ResultCache(tmp_path, max_bytes=4)
+    assert cache.put("k", b"12345", {}) is None
+    assert cache.get("k") is None
+
+def test_missing_file_is_a_miss_and_persisted(tmp_path):
+    cache = ResultCache(tmp_path)
+    entry = cache.put("k", b"glb", {})
+    (tmp_path / entry['file']).unlink()
+
+    assert cache.get("k") is None
+    assert cache.path_for(entry['file']) is None
+    assert json.loads((tmp_path / "index.json").read_text()) == {}
+
+def test_index_survives_restart(tmp_path):
+    ResultCache(tmp_path).put("k", b"glb", {"faces": 2})
+    assert ResultCache(tmp_path).get("k")['stats'] == {"faces": 2}
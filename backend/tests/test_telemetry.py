@@ -0,0 +1,29 @@
+import generation
+from pipeline import artifacts, telemetry
+
+def test_finish_telemetry_waits_for_debug_artifacts(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "ARTIFACT_DIR", tmp_path)
+    telemetry.drain()
+
+    leftover = generation.start_telemetry()
+    with artifacts.capturing(True, "job"):
+        path = artifacts.save_json("cleanup", "stats", {"faces": 8000})
+    drained = generation.finish_telemetry(leftover)
+
+    assert path.exists()
+    assert str(path) in drained['written']
+    assert drained['bytes_written'] == path.stat().st_size
+
+def test_start_telemetry_keeps_earlier_writes(tmp_path):
+    telemetry.drain()
+    earlier = tmp_path / "earlier.glb"
+    earlier.write_bytes(b"glb")
+    telemetry.record_write(earlier)
+    telemetry.record_timing("failed_stage", 1.0)
+
+    leftover = generation.start_telemetry()
+    drained = generation.finish_telemetry(leftover)
+
+    assert drained['written'] == [str(earlier)]
+    assert drained['bytes_written'] == 3
+    assert drained['timings'] == []
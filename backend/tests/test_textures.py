@@ -0,0 +1,18 @@
+import warnings
+
+import numpy as np
+
+from pipeline.stage4_textures import to_image
+
+def test_to_image_modes_without_deprecation_warnings():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        gray = to_image(np.zeros((4, 4), dtype=np.uint8))
+        color = to_image(np.zeros((4, 4, 3), dtype=np.uint8))
+
+    assert gray.mode == "L"
+    assert color.mode == "RGB"
+
+def test_to_image_keeps_pixels():
+    texture = np.arange(48, dtype=np.uint8).reshape(4, 4, 3)
+    np.testing.assert_array_equal(np.asarray(to_image(texture)), texture)
@@ -90,7 +90,8 @@ function App() {
 
             if (data.stage === 'complete' && data.file) {
               // Download the GLB file
-              const fileResponse = await fetch(`http://localhost:8000/api/download/${data.file.split('/').pop()}`);
+              const downloadPath = data.download_url || `/api/download/${data.file}`;
+              const fileResponse = await fetch(`http://localhost:8000${downloadPath}`);
               const blob = await fileResponse.blob();
               const modelUrl = URL.createObjectURL(blob);
 